@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Window:
+    __slots__ = ("payload", "count", "opened_at", "pending")
+
+    def __init__(self, payload: Dict[str, Any], opened_at: float):
+        self.payload = payload
+        self.count = 1
+        self.opened_at = opened_at
+        self.pending = True
+
+
+class AlertBroadcaster:
+    """Fans dev tools alerts out to the admin Socket.IO room only, coalesced and batched.
+
+    Repeats from the same visitor session within coalesce_window collapse into the first alert of
+    the window, carrying a count. Changed alerts are emitted together as one 'dev_tools_alerts'
+    event every emit_interval seconds, so a noisy visitor costs admins at most one message per interval.
+    """
+
+    def __init__(self, sio, room: str = "admin", coalesce_window: float = 30.0, emit_interval: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.sio = sio
+        self.room = room
+        self.coalesce_window = coalesce_window
+        self.emit_interval = emit_interval
+        self.clock = clock
+        self._windows: Dict[Hashable, _Window] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.coalesced = 0
+        self.emits = 0
+
+    def publish(self, key: Hashable, payload: Dict[str, Any]):
+        """Queue an alert for the next batch; key identifies the visitor session it came from"""
+        self.published += 1
+        now = self.clock()
+        window = self._windows.get(key)
+        if window is not None and now - window.opened_at < self.coalesce_window:
+            window.count += 1
+            window.payload["last_seen"] = payload["timestamp"]
+            window.pending = True
+            self.coalesced += 1
+            return
+        self._windows[key] = _Window({**payload, "last_seen": payload["timestamp"]}, now)
+
+    async def flush(self):
+        now = self.clock()
+        batch: List[Dict[str, Any]] = []
+        for key, window in list(self._windows.items()):
+            if window.pending:
+                batch.append({**window.payload, "count": window.count})
+                window.pending = False
+            elif now - window.opened_at >= self.coalesce_window:
+                del self._windows[key]
+        if batch:
+            await self.sio.emit("dev_tools_alerts", batch, room=self.room)
+            self.emits += 1
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.emit_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error emitting dev tools alerts: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "emits": self.emits,
+            "open_windows": len(self._windows)
+        }
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('drop', 'sample', 'reject')
+
+# MongoDB error code of a unique index violation
+DUPLICATE_KEY = 11000
+
+
+class AnalyticsBufferFull(Exception):
+    """Raised by enqueue() when the buffer is full and the overflow policy is 'reject'"""
+
+
+class AnalyticsWriteBuffer:
+    """Write-behind queue that batches analytics inserts off the request path.
+
+    Documents are grouped per collection and written with unordered insert_many either when
+    batch_size documents are pending or every flush_interval seconds, whichever comes first.
+    Memory is bounded by max_size; once it is reached the overflow policy decides what happens:
+    'drop' discards the event, 'reject' raises AnalyticsBufferFull, and 'sample' starts admitting
+    only sample_rate of the events from 80% occupancy before dropping at the limit. A batch that
+    fails without reaching MongoDB is requeued for the next flush, within the same max_size.
+    """
+
+    def __init__(self, db, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0,
+                 overflow_policy: str = 'drop', sample_rate: float = 0.1):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {', '.join(OVERFLOW_POLICIES)}")
+        self.db = db
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.sample_rate = sample_rate
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._depth = 0
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[str, List[Dict[str, Any]]], Awaitable[None]]] = []
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.requeued = 0
+        self.flushes = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    def pending(self, collection: str) -> int:
+        return len(self._pending.get(collection, ()))
+
+    def add_flush_listener(self, listener: Callable[[str, List[Dict[str, Any]]], Awaitable[None]]):
+        """Register a coroutine called with (collection, documents) after each successful write"""
+        self._listeners.append(listener)
+
+    def _admit(self) -> bool:
+        if self._depth >= self.max_size:
+            if self.overflow_policy == 'reject':
+                self.rejected += 1
+                raise AnalyticsBufferFull("Analytics buffer is full")
+            self.dropped += 1
+            return False
+        if self.overflow_policy == 'sample' and self._depth >= self.max_size * 0.8:
+            if random.random() >= self.sample_rate:
+                self.sampled_out += 1
+                return False
+        return True
+
+    def enqueue(self, collection: str, document: Dict[str, Any]) -> bool:
+        """Queue a document for insertion; returns False when the overflow policy discarded it"""
+        if not self._admit():
+            return False
+        self._pending.setdefault(collection, []).append(document)
+        self._depth += 1
+        self.enqueued += 1
+        if self._depth >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Analytics write buffer started")
+
+    async def stop(self):
+        """Stop the background flusher and drain everything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info("Analytics write buffer drained")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing analytics buffer: {e}")
+
+    async def flush(self):
+        """Write every pending document now"""
+        async with self._flush_lock:
+            self._wakeup.clear()
+            if not self._depth:
+                return
+            pending, self._pending, self._depth = self._pending, {}, 0
+
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                self._write(collection, documents[i:i + self.batch_size])
+                for collection, documents in pending.items()
+                for i in range(0, len(documents), self.batch_size)
+            ))
+            latency = time.perf_counter() - started
+
+            self.flushes += 1
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+            self._total_flush_latency += latency
+
+    def _requeue(self, collection: str, documents: List[Dict[str, Any]]) -> int:
+        """Put documents back at the front of the queue, as many as max_size leaves room for"""
+        kept = documents[:max(self.max_size - self._depth, 0)]
+        if kept:
+            self._pending[collection] = kept + self._pending.get(collection, [])
+            self._depth += len(kept)
+        return len(kept)
+
+    async def _write(self, collection: str, documents: List[Dict[str, Any]]):
+        try:
+            await self.db[collection].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Unordered, so every document without a write error was inserted. A duplicate key means
+            # an earlier attempt that was requeued after a connection error did insert it.
+            failed = {error["index"] for error in e.details.get("writeErrors", [])
+                      if error.get("code") != DUPLICATE_KEY}
+            written = [document for index, document in enumerate(documents) if index not in failed]
+            self.written += len(written)
+            self.failed += len(failed)
+            logger.error(f"Error writing {len(failed)} of {len(documents)} documents to {collection}: {e}")
+        except PyMongoError as e:
+            # Nothing is known to be written (connection lost, no primary): retry with the next flush
+            requeued = self._requeue(collection, documents)
+            self.requeued += requeued
+            self.failed += len(documents) - requeued
+            logger.warning(f"Error writing {len(documents)} documents to {collection}, requeued {requeued}: {e}")
+            return
+        else:
+            written = documents
+            self.written += len(documents)
+        if written:
+            await self.notify(collection, written)
+
+    async def notify(self, collection: str, documents: List[Dict[str, Any]]):
+        """Run the flush listeners for documents written outside the buffer (e.g. batch endpoints)"""
+        for listener in self._listeners:
+            try:
+                await listener(collection, documents)
+            except Exception as e:
+                logger.error(f"Error in analytics flush listener: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "depth": self._depth,
+            "max_size": self.max_size,
+            "overflow_policy": self.overflow_policy,
+            "pending": {collection: len(documents) for collection, documents in self._pending.items()},
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "last_flush_latency_ms": round(self.last_flush_latency * 1000, 3),
+            "avg_flush_latency_ms": round(self._total_flush_latency / self.flushes * 1000, 3) if self.flushes else 0.0,
+            "max_flush_latency_ms": round(self.max_flush_latency * 1000, 3)
+        }
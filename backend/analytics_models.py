@@ -57,6 +57,7 @@ class AnalyticsStats(BaseModel):
     recent_visitors: List[Dict[str, Any]] = Field(default_factory=list)
     dev_tools_alerts: int = 0
     active_sessions: int = 0
+    windows: Dict[str, Dict[str, int]] = Field(default_factory=dict)  # {"24h": {"sessions": ..}, "7d": .., "30d": ..}
 
 class VisitorSessionCreate(BaseModel):
     visitor_id: str
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+HOURLY = "analytics_rollups_hourly"
+DAILY = "analytics_rollups_daily"
+
+# Windows served from rollups: (name, span, collection); short windows read hourly buckets
+WINDOWS = [
+    ("24h", timedelta(hours=24), HOURLY),
+    ("7d", timedelta(days=7), HOURLY),
+    ("30d", timedelta(days=30), DAILY),
+]
+
+# Hourly buckets are only read for the windows above, so MongoDB expires them after this (TTL index)
+HOURLY_RETENTION = timedelta(days=8)
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def encode_key(value: str) -> str:
+    """Make a page URL or country usable as a MongoDB field name ('.' and '$' are reserved)"""
+    if not value:
+        return '%00'
+    return value.replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def decode_key(value: str) -> str:
+    if value == '%00':
+        return ''
+    return value.replace('%24', '$').replace('%2E', '.').replace('%25', '%')
+
+
+def event_increments(collection: str, document: Dict[str, Any]) -> Tuple[Optional[datetime], Dict[str, int]]:
+    """Counter increments contributed by one raw analytics document, with the time it counts at"""
+    if collection == "visitor_sessions":
+        increments = {"sessions": 1}
+        country = document.get("country")
+        if country and country != "Unknown":
+            increments[f"countries.{encode_key(country)}"] = 1
+        if document.get("session_end") is not None and document.get("total_time_spent", 0) > 0:
+            increments["session_time"] = document["total_time_spent"]
+            increments["timed_sessions"] = 1
+        return document.get("session_start"), increments
+    if collection == "page_views":
+        page = encode_key(document.get("page_url") or "")
+        return document.get("timestamp"), {
+            "page_views": 1,
+            f"pages.{page}.views": 1,
+            f"pages.{page}.time": document.get("time_spent", 0)
+        }
+    if collection == "dev_tools_alerts":
+        return document.get("timestamp"), {"dev_tools_alerts": 1}
+    return None, {}
+
+
+class AnalyticsRollups:
+    """Hourly and daily pre-aggregated counters for sessions, page views, countries and alerts"""
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _accumulate(buckets: Dict[Tuple[str, datetime], Dict[str, int]], moment: datetime,
+                    increments: Dict[str, int]):
+        for key in ((HOURLY, hour_bucket(moment)), (DAILY, day_bucket(moment))):
+            counters = buckets[key]
+            for field, amount in increments.items():
+                counters[field] = counters.get(field, 0) + amount
+
+    async def _apply(self, buckets: Dict[Tuple[str, datetime], Dict[str, int]], operator: str = "$inc"):
+        operations = defaultdict(list)
+        for (collection, bucket), counters in buckets.items():
+            counters = {field: amount for field, amount in counters.items() if amount}
+            if counters:
+                operations[collection].append(UpdateOne(
+                    {"_id": bucket},
+                    {operator: counters, "$setOnInsert": {"bucket": bucket}},
+                    upsert=True
+                ))
+        try:
+            await asyncio.gather(*(
+                self.db[collection].bulk_write(ops, ordered=False)
+                for collection, ops in operations.items()
+            ))
+        except Exception as e:
+            logger.error(f"Error updating analytics rollups: {e}")
+
+    async def record(self, collection: str, documents: Iterable[Dict[str, Any]]):
+        """Fold a batch of freshly written raw documents into the rollups"""
+        buckets = defaultdict(dict)
+        for document in documents:
+            moment, increments = event_increments(collection, document)
+            if moment is not None and increments:
+                self._accumulate(buckets, moment, increments)
+        if buckets:
+            await self._apply(buckets)
+
+    async def record_session_end(self, session: Dict[str, Any], total_time: int):
+        """Adjust duration counters given the session document as it was before it ended"""
+        previous = session.get("total_time_spent", 0) if session.get("session_end") is not None else 0
+        increments = {
+            "session_time": max(total_time, 0) - max(previous, 0),
+            "timed_sessions": int(total_time > 0) - int(previous > 0)
+        }
+        buckets = defaultdict(dict)
+        self._accumulate(buckets, session["session_start"], increments)
+        await self._apply(buckets)
+
+    async def rebuild(self):
+        """Recompute every bucket from the raw collections (backfill / compaction)"""
+        buckets = defaultdict(dict)
+        for collection in ("visitor_sessions", "page_views", "dev_tools_alerts"):
+            async for document in self.db[collection].find({}, {"_id": 0}):
+                moment, increments = event_increments(collection, document)
+                if moment is not None and increments:
+                    self._accumulate(buckets, moment, increments)
+        await asyncio.gather(self.db[HOURLY].delete_many({}), self.db[DAILY].delete_many({}))
+        if buckets:
+            # Absolute values, so overlapping or repeated rebuilds can't double the counters
+            await self._apply(buckets, "$set")
+        logger.info(f"Rebuilt {len(buckets)} analytics rollup buckets")
+
+    async def read_stats(self, now: datetime) -> Dict[str, Any]:
+        """All-time totals, top pages and countries from daily buckets plus the 24h/7d/30d windows"""
+        def top(field: str, group: Dict[str, Any], sort_field: str) -> List[Dict]:
+            return [
+                {"$project": {"entry": {"$objectToArray": f"${field}"}}},
+                {"$unwind": "$entry"},
+                {"$group": {"_id": "$entry.k", **group}},
+                {"$sort": {sort_field: -1}},
+                {"$limit": 10}
+            ]
+
+        totals_stage = {"$group": {
+            "_id": None,
+            "sessions": {"$sum": "$sessions"},
+            "page_views": {"$sum": "$page_views"},
+            "dev_tools_alerts": {"$sum": "$dev_tools_alerts"},
+            "session_time": {"$sum": "$session_time"},
+            "timed_sessions": {"$sum": "$timed_sessions"}
+        }}
+        daily_pipeline = [{"$facet": {
+            "totals": [totals_stage],
+            "pages": top("pages", {"views": {"$sum": "$entry.v.views"}, "time": {"$sum": "$entry.v.time"}}, "views"),
+            "countries": top("countries", {"visitors": {"$sum": "$entry.v"}}, "visitors"),
+            **{name: [{"$match": {"bucket": {"$gte": day_bucket(now - span)}}}, totals_stage]
+               for name, span, collection in WINDOWS if collection == DAILY}
+        }}]
+        hourly_pipeline = [{"$facet": {
+            name: [{"$match": {"bucket": {"$gte": hour_bucket(now - span)}}}, totals_stage]
+            for name, span, collection in WINDOWS if collection == HOURLY
+        }}]
+
+        daily_result, hourly_result = await asyncio.gather(
+            self.db[DAILY].aggregate(daily_pipeline).to_list(1),
+            self.db[HOURLY].aggregate(hourly_pipeline).to_list(1)
+        )
+        facets = {**daily_result[0], **hourly_result[0]}
+
+        def totals(facet: List[Dict]) -> Dict[str, int]:
+            row = facet[0] if facet else {}
+            return {field: row.get(field, 0) for field in
+                    ("sessions", "page_views", "dev_tools_alerts", "session_time", "timed_sessions")}
+
+        all_time = totals(facets["totals"])
+        return {
+            "total_sessions": all_time["sessions"],
+            "total_page_views": all_time["page_views"],
+            "avg_session_duration": (all_time["session_time"] / all_time["timed_sessions"]
+                                     if all_time["timed_sessions"] else 0),
+            "most_visited_pages": [
+                {
+                    "page": decode_key(item["_id"]),
+                    "views": item["views"],
+                    "avg_time_spent": round(item["time"] / item["views"], 2) if item["views"] else 0
+                } for item in facets["pages"]
+            ],
+            "visitor_countries": [
+                {"country": decode_key(item["_id"]), "visitors": item["visitors"]}
+                for item in facets["countries"]
+            ],
+            "windows": {
+                name: {field: value for field, value in totals(facets[name]).items()
+                       if field in ("sessions", "page_views", "dev_tools_alerts")}
+                for name, _, _ in WINDOWS
+            }
+        }
@@ -1,66 +1,71 @@
 import asyncio
+import logging
+import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import re
-from user_agents import parse as parse_user_agent
-import requests
+from user_agent_parser import UserAgentParser
+from geoip_resolver import GeoIPResolver, ip_prefix
+from cache import LRUCache
+from analytics_rollups import AnalyticsRollups
+from hyperloglog import UniqueVisitorSketches
+
+logger = logging.getLogger(__name__)
 
 class AnalyticsService:
     def __init__(self):
-        self.reader = None
-        print("Analytics service initialized")
+        self.geoip = GeoIPResolver()
+        self.location_cache = LRUCache(
+            max_entries=int(os.environ.get('GEOIP_CACHE_MAX_ENTRIES', 10000)),
+            ttl=float(os.environ.get('GEOIP_CACHE_TTL_SECONDS', 3600))
+        )
+        self.user_agent_parser = UserAgentParser(
+            max_entries=int(os.environ.get('USER_AGENT_CACHE_MAX_ENTRIES', 1024))
+        )
+        # 'hll' answers unique visitors from HyperLogLog sketches, 'exact' groups visitor_sessions
+        self.unique_visitors_mode = os.environ.get('UNIQUE_VISITORS_MODE', 'hll')
+        logger.info("Analytics service initialized")
 
     def get_location_data(self, ip_address: str) -> Dict[str, Optional[str]]:
-        """Get location data from IP address using a free IP geolocation service"""
-        if ip_address in ['127.0.0.1', 'localhost', '::1']:
-            return {
-                'country': 'Local',
-                'city': 'Local',
-                'region': 'Local',
-                'latitude': None,
-                'longitude': None
-            }
-
-        try:
-            # Using ipapi.co free service (100 requests per day limit)
-            response = requests.get(f'https://ipapi.co/{ip_address}/json/', timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'country': data.get('country_name', 'Unknown'),
-                    'city': data.get('city', 'Unknown'),
-                    'region': data.get('region', 'Unknown'),
-                    'latitude': float(data.get('latitude')) if data.get('latitude') else None,
-                    'longitude': float(data.get('longitude')) if data.get('longitude') else None
-                }
-        except Exception as e:
-            print(f"Error getting location for IP {ip_address}: {e}")
+        """Get location data from IP address using the local GeoIP database"""
+        return self.geoip.lookup(ip_address)
 
-        # Fallback for demo purposes
-        return {
-            'country': 'Unknown',
-            'city': 'Unknown', 
-            'region': 'Unknown',
-            'latitude': None,
-            'longitude': None
-        }
+    async def lookup_location(self, ip_address: str) -> Dict[str, Optional[str]]:
+        """Cached location lookup keyed by network prefix; concurrent misses share one resolution"""
+        location = await self.location_cache.get_or_load(
+            ip_prefix(ip_address),
+            lambda: asyncio.to_thread(self.get_location_data, ip_address)
+        )
+        return dict(location)
 
     def parse_user_agent(self, user_agent: str) -> Dict[str, str]:
         """Parse user agent string"""
-        try:
-            ua = parse_user_agent(user_agent)
-            return {
-                'browser': f"{ua.browser.family} {ua.browser.version_string}",
-                'device': f"{ua.device.brand} {ua.device.model}".strip() if ua.device.brand else ua.os.family,
-                'os': f"{ua.os.family} {ua.os.version_string}"
-            }
-        except Exception as e:
-            print(f"Error parsing user agent: {e}")
-            return {
-                'browser': 'Unknown',
-                'device': 'Unknown',
-                'os': 'Unknown'
-            }
+        return self.user_agent_parser.parse(user_agent)
+
+    async def count_unique_visitors(self, db, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                    exact: Optional[bool] = None) -> int:
+        """Unique visitors overall or for the inclusive day range [start, end]"""
+        if exact is None:
+            exact = self.unique_visitors_mode == 'exact'
+        if not exact:
+            sketches = UniqueVisitorSketches(db)
+            if start is None and end is None:
+                return await sketches.count_all_time()
+            return await sketches.count_days(start or datetime(1970, 1, 1), end or datetime.utcnow())
+
+        query = {}
+        if start is not None or end is not None:
+            query["session_start"] = {}
+            if start is not None:
+                query["session_start"]["$gte"] = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            if end is not None:
+                query["session_start"]["$lt"] = end.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        result = await db.visitor_sessions.aggregate([
+            {"$match": query},
+            {"$group": {"_id": "$visitor_id"}},
+            {"$count": "count"}
+        ]).to_list(1)
+        return result[0]["count"] if result else 0
 
     async def calculate_analytics_stats(self, db) -> Dict:
         """Calculate comprehensive analytics statistics"""
@@ -68,66 +73,37 @@ class AnalyticsService:
             # Get current time and time ranges
             now = datetime.utcnow()
             last_24h = now - timedelta(hours=24)
-            last_7d = now - timedelta(days=7)
-            last_30d = now - timedelta(days=30)
-
-            # Total and unique visitors
-            total_visitors = await db.visitor_sessions.count_documents({})
-            unique_visitors = len(await db.visitor_sessions.distinct("visitor_id"))
-
-            # Active sessions (last 30 minutes)
             active_cutoff = now - timedelta(minutes=30)
-            active_sessions = await db.visitor_sessions.count_documents({
-                "session_start": {"$gte": active_cutoff},
-                "session_end": None
-            })
-
-            # Total sessions and page views
-            total_sessions = await db.visitor_sessions.count_documents({})
-            total_page_views = await db.page_views.count_documents({})
-
-            # Average session duration
-            sessions_with_duration = await db.visitor_sessions.find({
-                "session_end": {"$ne": None}
-            }).to_list(1000)
-            
-            avg_duration = 0
-            if sessions_with_duration:
-                durations = [s.get('total_time_spent', 0) for s in sessions_with_duration if s.get('total_time_spent', 0) > 0]
-                avg_duration = sum(durations) / len(durations) if durations else 0
-
-            # Most visited pages
-            page_views_agg = await db.page_views.aggregate([
-                {"$group": {"_id": "$page_url", "count": {"$sum": 1}, "avg_time": {"$avg": "$time_spent"}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 10}
-            ]).to_list(10)
-
-            most_visited = [
-                {
-                    "page": item["_id"],
-                    "views": item["count"],
-                    "avg_time_spent": round(item.get("avg_time", 0), 2)
-                } for item in page_views_agg
-            ]
-
-            # Visitor countries
-            countries_agg = await db.visitor_sessions.aggregate([
-                {"$match": {"country": {"$ne": None, "$ne": "Unknown"}}},
-                {"$group": {"_id": "$country", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 10}
-            ]).to_list(10)
 
-            visitor_countries = [
-                {"country": item["_id"], "visitors": item["count"]}
-                for item in countries_agg
-            ]
-
-            # Recent visitors (last 24 hours)
-            recent_visitors_data = await db.visitor_sessions.find({
-                "session_start": {"$gte": last_24h}
-            }).sort("session_start", -1).limit(20).to_list(20)
+            # Counters, top pages/countries and the 24h/7d/30d windows come from the rollups;
+            # unique visitors come from the sketches and only active/recent sessions read visitor_sessions
+            sessions_pipeline = [{"$facet": {
+                # Active sessions (last 30 minutes)
+                "active": [
+                    {"$match": {"session_start": {"$gte": active_cutoff}, "session_end": None}},
+                    {"$count": "count"}
+                ],
+                # Recent visitors (last 24 hours)
+                "recent": [
+                    {"$match": {"session_start": {"$gte": last_24h}}},
+                    {"$sort": {"session_start": -1}},
+                    {"$limit": 20},
+                    {"$project": {
+                        "_id": 0, "visitor_id": 1, "country": 1, "city": 1,
+                        "browser": 1, "total_time_spent": 1, "session_start": 1
+                    }}
+                ]
+            }}]
+
+            rollup_stats, unique_visitors, sessions_result = await asyncio.gather(
+                AnalyticsRollups(db).read_stats(now),
+                self.count_unique_visitors(db),
+                db.visitor_sessions.aggregate(sessions_pipeline).to_list(1)
+            )
+            sessions = sessions_result[0]
+
+            def facet_count(facet: List[Dict]) -> int:
+                return facet[0]["count"] if facet else 0
 
             recent_visitors = [
                 {
@@ -137,29 +113,25 @@ class AnalyticsService:
                     "browser": visitor.get("browser", "Unknown"),
                     "time_spent": visitor.get("total_time_spent", 0),
                     "timestamp": visitor.get("session_start")
-                } for visitor in recent_visitors_data
+                } for visitor in sessions["recent"]
             ]
 
-            # Dev tools alerts count
-            dev_tools_alerts = await db.dev_tools_alerts.count_documents({
-                "timestamp": {"$gte": last_7d}
-            })
-
             return {
-                "total_visitors": total_visitors,
+                "total_visitors": rollup_stats["total_sessions"],
                 "unique_visitors": unique_visitors,
-                "total_sessions": total_sessions,
-                "avg_session_duration": round(avg_duration, 2),
-                "total_page_views": total_page_views,
-                "most_visited_pages": most_visited,
-                "visitor_countries": visitor_countries,
+                "total_sessions": rollup_stats["total_sessions"],
+                "avg_session_duration": round(rollup_stats["avg_session_duration"], 2),
+                "total_page_views": rollup_stats["total_page_views"],
+                "most_visited_pages": rollup_stats["most_visited_pages"],
+                "visitor_countries": rollup_stats["visitor_countries"],
                 "recent_visitors": recent_visitors,
-                "dev_tools_alerts": dev_tools_alerts,
-                "active_sessions": active_sessions
+                "dev_tools_alerts": rollup_stats["windows"]["7d"]["dev_tools_alerts"],
+                "active_sessions": facet_count(sessions["active"]),
+                "windows": rollup_stats["windows"]
             }
 
         except Exception as e:
-            print(f"Error calculating analytics stats: {e}")
+            logger.error(f"Error calculating analytics stats: {e}")
             return {
                 "total_visitors": 0,
                 "unique_visitors": 0,
@@ -170,7 +142,8 @@ class AnalyticsService:
                 "visitor_countries": [],
                 "recent_visitors": [],
                 "dev_tools_alerts": 0,
-                "active_sessions": 0
+                "active_sessions": 0,
+                "windows": {}
             }
 
 # Global analytics service instance
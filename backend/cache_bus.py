@@ -0,0 +1,202 @@
+import asyncio
+import inspect
+from abc import ABC, abstractmethod
+import json
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+Handler = Callable[[Dict[str, Any]], Union[Awaitable[None], None]]
+
+# Published by a bus to its own subscribers when it may have missed messages (backend reconnect)
+RESYNC = "resync"
+
+
+class CacheBus(ABC):
+    """Fans in-process cache changes (invalidations, index updates, revocations) out to the other workers.
+
+    The publishing worker applies a change itself and then publishes it; subscribers run on every
+    other worker. publish never waits on the backend: messages are queued and sent in order by a
+    background task, and a full queue drops the message: other workers' cached responses then last
+    until their TTL, or until the next invalidation for tags without one (bootstrap).
+    """
+
+    def __init__(self, max_pending: int = 10000):
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._sender: Optional[asyncio.Task] = None
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+
+    @property
+    def distributed(self) -> bool:
+        """Whether any other worker can receive what this bus publishes"""
+        return True
+
+    def subscribe(self, topic: str, handler: Handler):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def publish(self, topic: str, payload: Dict[str, Any]):
+        if not self.distributed:
+            return
+        message = json.dumps({"origin": self.origin, "topic": topic, "payload": jsonable_encoder(payload)})
+        try:
+            self._outbox.put_nowait(message)
+            self.published += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Cache bus queue full, dropped {topic} message")
+
+    async def _dispatch(self, topic: str, payload: Dict[str, Any]):
+        for handler in self._handlers.get(topic, []):
+            try:
+                result = handler(payload)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error in cache bus handler for {topic}: {e}")
+
+    async def _deliver(self, message: Union[str, bytes]):
+        data = json.loads(message)
+        if data.get("origin") == self.origin:
+            return
+        self.received += 1
+        await self._dispatch(data["topic"], data.get("payload") or {})
+
+    @abstractmethod
+    async def _send(self, message: str):
+        """Deliver an encoded message to the other workers"""
+
+    async def _run_sender(self):
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self._send(message)
+            except Exception as e:
+                logger.error(f"Error publishing to cache bus: {e}")
+
+    async def start(self):
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._run_sender())
+
+    async def stop(self):
+        if self._sender is not None:
+            self._sender.cancel()
+            try:
+                await self._sender
+            except asyncio.CancelledError:
+                pass
+            self._sender = None
+        # Let queued messages go out before shutting down
+        while not self._outbox.empty():
+            try:
+                await self._send(self._outbox.get_nowait())
+            except Exception as e:
+                logger.error(f"Error publishing to cache bus: {e}")
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "pending": self._outbox.qsize()
+        }
+
+
+class LocalCacheBus(CacheBus):
+    """In-process bus for a single worker, where publishing is a no-op.
+
+    Buses created on the same hub deliver to each other, which stands in for several workers
+    sharing a backend in tests.
+    """
+
+    def __init__(self, hub: Optional[List["LocalCacheBus"]] = None, max_pending: int = 10000):
+        super().__init__(max_pending)
+        self.hub = hub if hub is not None else []
+        self.hub.append(self)
+
+    @property
+    def distributed(self) -> bool:
+        return len(self.hub) > 1
+
+    async def _send(self, message: str):
+        for bus in self.hub:
+            if bus is not self:
+                await bus._deliver(message)
+
+
+class RedisCacheBus(CacheBus):
+    """Bus over Redis pub/sub (or any server speaking the Redis protocol, such as Valkey or KeyDB)"""
+
+    def __init__(self, url: str, channel: str = "portfolio:cache-bus", max_pending: int = 10000):
+        if aioredis is None:
+            raise RuntimeError("A shared backend URL is configured but the redis package is not installed")
+        super().__init__(max_pending)
+        self.url = url
+        self.channel = channel
+        self._redis = aioredis.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def _send(self, message: str):
+        await self._redis.publish(self.channel, message)
+
+    async def _listen(self):
+        connected_before = False
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                if connected_before:
+                    # Anything published while we were disconnected is gone; let subscribers catch up
+                    logger.warning("Cache bus reconnected, resynchronizing local caches")
+                    await self._dispatch(RESYNC, {})
+                connected_before = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await self._deliver(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache bus subscription lost: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def start(self):
+        await super().start()
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await super().stop()
+        await self._redis.aclose()
+
+
+def create_cache_bus(url: Optional[str]) -> CacheBus:
+    """RedisCacheBus for a redis:// (or rediss://) URL, otherwise the single-process LocalCacheBus"""
+    if url:
+        return RedisCacheBus(url)
+    return LocalCacheBus()
@@ -0,0 +1,134 @@
+import gzip
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from request_timing import phase
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as is: the framing overhead outweighs the savings
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+# Per-request compression favours speed, cache-fill compression runs once so it can use the maximum
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 4))
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = int(os.environ.get('STATIC_BROTLI_QUALITY', 11))
+
+# In order of preference when the client weighs them equally
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def negotiate(accept_encoding: Optional[str], available: Sequence[str] = ENCODINGS) -> Optional[str]:
+    """Pick the preferred available content coding from an Accept-Encoding header (RFC 9110 12.5.3)"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                continue
+        weights[coding.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, wildcard)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+
+def precompress(body: bytes) -> Tuple[Tuple[str, bytes], ...]:
+    """Every supported encoding of a body at maximum compression, skipping any that doesn't shrink it"""
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return ()
+    encoded = ((encoding, compress(body, encoding, static=True)) for encoding in ENCODINGS)
+    return tuple((encoding, data) for encoding, data in encoded if len(data) < len(body))
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Each encoding is a different representation, so it gets its own entity tag"""
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+
+def _vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    return headers + [(b"vary", b"Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    """gzip / brotli for complete (non-streamed) responses above COMPRESSION_MIN_SIZE.
+
+    Responses that already carry a Content-Encoding, such as precompressed response cache entries,
+    pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = negotiate(accept_encoding)
+        start_message = None
+
+        async def compressing_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            start, start_message = start_message, None
+            headers = list(start.get("headers", []))
+            names = {name.lower(): value for name, value in headers}
+            body = message.get("body", b"")
+            content_type = names.get(b"content-type", b"").decode("latin-1")
+            if (message.get("more_body") or b"content-encoding" in names or len(body) < self.minimum_size
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                await send(start)
+                await send(message)
+                return
+
+            headers = _vary(headers)
+            if encoding is not None:
+                with phase("compress"):
+                    body = compress(body, encoding)
+                headers = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"etag")]
+                headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(body)).encode())]
+                if b"etag" in names:
+                    etag = encoded_etag(names[b"etag"].decode("latin-1"), encoding)
+                    headers.append((b"etag", etag.encode("latin-1")))
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,93 @@
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+FACETS_COLLECTION = "content_facets"
+
+
+class FacetSource(NamedTuple):
+    collection: str
+    fields: Tuple[str, ...]
+    include: Callable[[Dict[str, Any]], bool] = lambda document: True
+
+
+# Faceted fields per content section; blog counts cover published posts only (they feed the public tag cloud)
+FACETS: Dict[str, FacetSource] = {
+    "blog": FacetSource("blog_posts", ("tags",), lambda document: bool(document.get("published"))),
+    "projects": FacetSource("projects", ("technologies", "status")),
+    "timeline": FacetSource("timeline", ("tags",)),
+}
+
+
+def _facet_values(source: FacetSource, document: Optional[Dict[str, Any]]) -> Counter:
+    values: Counter = Counter()
+    if document is None or not source.include(document):
+        return values
+    for field in source.fields:
+        value = document.get(field)
+        for item in set(value if isinstance(value, list) else [value]):
+            item = getattr(item, "value", item)  # enums such as ProjectStatus
+            if item:
+                values[(field, item)] += 1
+    return values
+
+
+class ContentFacets:
+    """Maintained value -> document count table for tags, technologies and project status.
+
+    One document per (section, field, value) is adjusted with $inc whenever content changes, so
+    filter chips and tag clouds read a handful of small documents instead of the content collections.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def apply(self, section: str, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]):
+        """Adjust counts for a document changing from before to after (None for create/delete)"""
+        source = FACETS[section]
+        delta = _facet_values(source, after)
+        delta.subtract(_facet_values(source, before))
+        await self._write(section, delta)
+
+    async def _write(self, section: str, delta: Counter, operator: str = "$inc"):
+        operations = [
+            UpdateOne(
+                {"_id": f"{section}:{field}:{value}"},
+                {operator: {"count": amount}, "$setOnInsert": {"section": section, "field": field, "value": value}},
+                upsert=True
+            )
+            for (field, value), amount in delta.items() if amount
+        ]
+        if not operations:
+            return
+        try:
+            await self.db[FACETS_COLLECTION].bulk_write(operations, ordered=False)
+            await self.db[FACETS_COLLECTION].delete_many({"section": section, "count": {"$lte": 0}})
+        except Exception as e:
+            logger.error(f"Error updating {section} facet counts: {e}")
+
+    async def counts(self, section: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Values of every faceted field of a section, most used first"""
+        counts: Dict[str, List[Dict[str, Any]]] = {field: [] for field in FACETS[section].fields}
+        cursor = self.db[FACETS_COLLECTION].find(
+            {"section": section, "count": {"$gt": 0}}, {"_id": 0, "field": 1, "value": 1, "count": 1}
+        ).sort([("count", -1), ("value", 1)])
+        async for document in cursor:
+            counts[document["field"]].append({"value": document["value"], "count": document["count"]})
+        return counts
+
+    async def rebuild(self):
+        """Recompute every count from the content collections"""
+        await self.db[FACETS_COLLECTION].delete_many({})
+        for section, source in FACETS.items():
+            totals: Counter = Counter()
+            projection = {"_id": 0, "published": 1, **{field: 1 for field in source.fields}}
+            async for document in self.db[source.collection].find({}, projection):
+                totals.update(_facet_values(source, document))
+            # Absolute counts, so overlapping or repeated rebuilds can't double them
+            await self._write(section, totals, "$set")
+        logger.info("Rebuilt content facet counts")
@@ -0,0 +1,383 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from analytics_rollups import DAILY, HOURLY, HOURLY_RETENTION, AnalyticsRollups
+from content_facets import FACETS_COLLECTION, ContentFacets
+from hyperloglog import HLL_PRECISION, UniqueVisitorSketches
+from reading_stats import reading_stats
+from token_verifier import REVOKED_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+# Filter selecting the one document of the about / experience / contact section collections
+SINGLETON: Dict[str, Any] = {"singleton": True}
+SINGLETON_COLLECTIONS = ("about", "experience", "contact")
+
+
+def _singleton_index() -> IndexModel:
+    """At most one marked document, so concurrent first-time upserts can't seed duplicates"""
+    return IndexModel([("singleton", ASCENDING)], name="singleton_unique", unique=True,
+                      partialFilterExpression=SINGLETON)
+
+
+def _id_index() -> IndexModel:
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+
+def _keyset_index(sort_key: str, *prefix: Tuple[str, int]) -> IndexModel:
+    """(sort key, id) index backing pagination.paginate, which orders by both descending"""
+    keys = [*prefix, (sort_key, DESCENDING), ("id", DESCENDING)]
+    return IndexModel(keys, name="_".join(key for key, _ in keys) + "_keyset")
+
+
+# Declarative index registry: collection -> indexes the hot queries in server.py rely on
+INDEXES: Dict[str, List[IndexModel]] = {
+    **{collection: [_singleton_index()] for collection in SINGLETON_COLLECTIONS},
+    "projects": [
+        _id_index(),
+        _keyset_index("created_at"),
+        _keyset_index("created_at", ("technologies", ASCENDING)),
+        _keyset_index("created_at", ("status", ASCENDING)),
+    ],
+    "timeline": [
+        _id_index(),
+        _keyset_index("year"),
+        _keyset_index("year", ("tags", ASCENDING)),
+    ],
+    "blog_posts": [
+        _id_index(),
+        _keyset_index("created_at"),
+        _keyset_index("created_at", ("published", ASCENDING)),
+        _keyset_index("created_at", ("tags", ASCENDING)),
+    ],
+    FACETS_COLLECTION: [
+        IndexModel([("section", ASCENDING), ("count", DESCENDING), ("value", ASCENDING)], name="section_count"),
+    ],
+    "status_checks": [
+        _id_index(),
+        _keyset_index("timestamp"),
+    ],
+    "contact_submissions": [
+        _keyset_index("submitted_at"),
+    ],
+    "visitor_sessions": [
+        _id_index(),
+        IndexModel([("session_start", DESCENDING)], name="session_start_desc"),
+        IndexModel([("session_end", ASCENDING), ("session_start", DESCENDING)], name="active_sessions"),
+        IndexModel([("visitor_id", ASCENDING)], name="visitor_id"),
+    ],
+    "page_views": [
+        IndexModel([("timestamp", DESCENDING)], name="timestamp_desc"),
+        IndexModel([("page_url", ASCENDING)], name="page_url"),
+        IndexModel([("session_id", ASCENDING)], name="session_id"),
+    ],
+    "dev_tools_alerts": [
+        _id_index(),
+        _keyset_index("timestamp"),
+    ],
+    REVOKED_TOKENS: [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    HOURLY: [
+        IndexModel([("bucket", ASCENDING)], name="bucket_ttl",
+                   expireAfterSeconds=int(HOURLY_RETENTION.total_seconds())),
+    ],
+    DAILY: [
+        IndexModel([("bucket", DESCENDING)], name="bucket_desc"),
+    ],
+}
+
+# Representative hot queries checked by the dry run: (collection, filter, sort)
+HOT_QUERIES: List[Tuple[str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("projects", {"id": ""}, []),
+    ("projects", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    *((collection, SINGLETON, []) for collection in SINGLETON_COLLECTIONS),
+    ("timeline", {"id": ""}, []),
+    ("timeline", {}, [("year", DESCENDING), ("id", DESCENDING)]),
+    ("blog_posts", {"id": ""}, []),
+    ("blog_posts", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("blog_posts", {"published": True}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("blog_posts", {"tags": ""}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("projects", {"technologies": ""}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("projects", {"status": ""}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("timeline", {"tags": ""}, [("year", DESCENDING), ("id", DESCENDING)]),
+    (FACETS_COLLECTION, {"section": "", "count": {"$gt": 0}}, [("count", DESCENDING), ("value", ASCENDING)]),
+    ("status_checks", {}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("contact_submissions", {}, [("submitted_at", DESCENDING), ("id", DESCENDING)]),
+    ("visitor_sessions", {"id": ""}, []),
+    ("visitor_sessions", {"session_start": {"$gte": datetime(1970, 1, 1)}}, [("session_start", DESCENDING)]),
+    ("visitor_sessions", {"session_start": {"$gte": datetime(1970, 1, 1)}, "session_end": None}, []),
+    ("dev_tools_alerts", {"id": ""}, []),
+    ("dev_tools_alerts", {}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("dev_tools_alerts", {"timestamp": {"$gte": datetime(1970, 1, 1)}}, []),
+]
+
+
+async def _backfill_rollups(db):
+    await AnalyticsRollups(db).rebuild()
+
+
+async def _backfill_unique_visitor_sketches(db):
+    await UniqueVisitorSketches(db).rebuild()
+
+
+SKETCH_PRECISION_MIGRATION = "0007_rebuild_unique_visitor_sketches_p"
+
+
+async def _rebuild_mismatched_sketches(db):
+    """Recompute the sketches after HLL_PRECISION changed (no-op when all match)"""
+    sketches = UniqueVisitorSketches(db)
+    if await sketches.mismatched():
+        await sketches.rebuild()
+    # Forget the records of other precisions, so switching back to one rebuilds again
+    await db.schema_migrations.delete_many({
+        "_id": {"$regex": f"^{SKETCH_PRECISION_MIGRATION}", "$ne": f"{SKETCH_PRECISION_MIGRATION}{sketches.precision}"}
+    })
+
+
+# Sort indexes replaced by the (sort key, id) keyset indexes, and the hourly bucket index by its TTL index
+SUPERSEDED_INDEXES: Dict[str, List[str]] = {
+    "projects": ["created_at_desc"],
+    "timeline": ["year_desc"],
+    "blog_posts": ["created_at_desc", "published_created_at"],
+    "contact_submissions": ["submitted_at_desc"],
+    "dev_tools_alerts": ["timestamp_desc"],
+    HOURLY: ["bucket_desc"],
+}
+
+
+async def _drop_superseded_indexes(db):
+    for collection, names in SUPERSEDED_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                try:
+                    await db[collection].drop_index(name)
+                except OperationFailure as e:
+                    # Already dropped by an earlier, interrupted run
+                    if e.code != 27:
+                        raise
+
+
+async def _backfill_blog_reading_stats(db):
+    async for post in db.blog_posts.find({"word_count": {"$exists": False}}, {"_id": 0, "id": 1, "content": 1}):
+        await db.blog_posts.update_one({"id": post["id"]}, {"$set": reading_stats(post.get("content", ""))})
+
+
+async def _build_content_facets(db):
+    await ContentFacets(db).rebuild()
+
+
+async def _mark_singletons(db):
+    """Mark the document the old find_one() calls returned as the section singleton"""
+    for collection in SINGLETON_COLLECTIONS:
+        if await db[collection].find_one(SINGLETON) is None:
+            document = await db[collection].find_one()
+            if document is not None:
+                await db[collection].update_one({"_id": document["_id"]}, {"$set": SINGLETON})
+
+
+# One-off data migrations, applied in order and recorded in schema_migrations. Each must be safe to
+# re-run: a worker that dies mid-migration leaves it to be run again by the next claimant.
+MIGRATIONS: List[Tuple[str, Callable[[Any], Awaitable[None]]]] = [
+    ("0001_backfill_analytics_rollups", _backfill_rollups),
+    ("0002_backfill_unique_visitor_sketches", _backfill_unique_visitor_sketches),
+    ("0003_drop_superseded_sort_indexes", _drop_superseded_indexes),
+    ("0004_backfill_blog_reading_stats", _backfill_blog_reading_stats),
+    ("0005_build_content_facets", _build_content_facets),
+    ("0006_mark_section_singletons", _mark_singletons),
+    # Named after the precision, so it runs again whenever HLL_PRECISION changes
+    (f"{SKETCH_PRECISION_MIGRATION}{HLL_PRECISION}", _rebuild_mismatched_sketches),
+    ("0008_drop_superseded_hourly_bucket_index", _drop_superseded_indexes),
+]
+
+
+async def duplicate_keys(db, collection: str, index: IndexModel, limit: int = 20) -> List[Dict[str, Any]]:
+    """Key values held by more than one document, which keep a unique index from being built"""
+    document = index.document
+    pipeline = []
+    if "partialFilterExpression" in document:
+        pipeline.append({"$match": document["partialFilterExpression"]})
+    pipeline += [
+        {"$group": {"_id": {key: f"${key}" for key in document["key"]}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ]
+    return [group["_id"] async for group in db[collection].aggregate(pipeline)]
+
+
+async def apply_indexes(db) -> Dict[str, List[str]]:
+    """Create every registered index; create_indexes is a no-op for indexes that already exist.
+
+    Indexes are created one at a time, so one that can't be built (say a unique index over
+    duplicate ids) doesn't take the others of its collection down with it.
+    """
+    async def apply(collection: str, indexes: List[IndexModel]) -> Tuple[str, List[str]]:
+        created = []
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                created += await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                if e.code != 11000:
+                    logger.error(f"Error creating index {name} on {collection}: {e}")
+                    continue
+                duplicates = await duplicate_keys(db, collection, index)
+                logger.error(f"Cannot create unique index {name} on {collection}, duplicated keys: {duplicates}. "
+                             "Remove the duplicates and restart to build it.")
+            except Exception as e:
+                logger.error(f"Error creating index {name} on {collection}: {e}")
+        return collection, created
+
+    results = await asyncio.gather(*(apply(collection, indexes) for collection, indexes in INDEXES.items()))
+    return dict(results)
+
+
+# A claim older than this is taken to belong to a worker that died mid-migration
+MIGRATION_LEASE = timedelta(minutes=10)
+MIGRATION_POLL_SECONDS = 0.5
+
+
+def _applied(document: Dict[str, Any]) -> bool:
+    # Records written before claims existed have no state
+    return document.get("state", "applied") == "applied"
+
+
+async def _claim(db, name: str, owner: str) -> bool:
+    """Claim a migration for this process, or take over a claim whose lease ran out"""
+    now = datetime.utcnow()
+    try:
+        await db.schema_migrations.insert_one({"_id": name, "state": "running", "owner": owner, "started_at": now})
+        return True
+    except DuplicateKeyError:
+        pass
+    stale = await db.schema_migrations.find_one_and_update(
+        {"_id": name, "state": "running", "started_at": {"$lt": now - MIGRATION_LEASE}},
+        {"$set": {"owner": owner, "started_at": now}}
+    )
+    return stale is not None
+
+
+async def _acquire(db, name: str, owner: str) -> bool:
+    """True when this process should run the migration, False once another one has applied it"""
+    while True:
+        if await _claim(db, name, owner):
+            return True
+        document = await db.schema_migrations.find_one({"_id": name})
+        if document is not None and _applied(document):
+            return False
+        # Another worker is running it; later migrations and startup may depend on it, so wait
+        await asyncio.sleep(MIGRATION_POLL_SECONDS)
+
+
+async def run_migrations(db) -> List[str]:
+    """Run migrations not yet recorded in schema_migrations.
+
+    Safe with several workers starting at once: a migration is claimed by inserting its record
+    (state 'running') before it runs, and the other workers wait until it is marked 'applied'.
+    """
+    applied = {document["_id"] async for document in db.schema_migrations.find() if _applied(document)}
+    owner = uuid.uuid4().hex
+    ran = []
+    for name, migration in MIGRATIONS:
+        if name in applied or not await _acquire(db, name, owner):
+            continue
+        logger.info(f"Applying migration {name}")
+        try:
+            await migration(db)
+        except BaseException:
+            # Release the claim so the next startup retries
+            await db.schema_migrations.delete_one({"_id": name, "owner": owner})
+            raise
+        await db.schema_migrations.update_one(
+            {"_id": name, "owner": owner},
+            {"$set": {"state": "applied", "applied_at": datetime.utcnow()}, "$unset": {"owner": ""}}
+        )
+        ran.append(name)
+    return ran
+
+
+async def bootstrap(db):
+    """Startup hook: apply the index registry, then pending migrations"""
+    await apply_indexes(db)
+    ran = await run_migrations(db)
+    logger.info(f"Database bootstrap complete ({len(ran)} migrations applied)")
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def dry_run(db) -> Dict[str, Any]:
+    """Report missing registry indexes (with the duplicates blocking unique ones) and hot queries
+    whose winning plan is a COLLSCAN"""
+    missing = {}
+    duplicates = {}
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        absent = [index for index in indexes if index.document["name"] not in existing]
+        if absent:
+            missing[collection] = [index.document["name"] for index in absent]
+        for index in absent:
+            if index.document.get("unique"):
+                keys = await duplicate_keys(db, collection, index)
+                if keys:
+                    duplicates[f"{collection}.{index.document['name']}"] = keys
+
+    collscans = []
+    for collection, query, sort in HOT_QUERIES:
+        command = {"find": collection, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        if "COLLSCAN" in stages:
+            collscans.append({"collection": collection, "filter": query, "sort": dict(sort), "plan": stages})
+    return {"missing_indexes": missing, "duplicate_keys": duplicates, "collscans": collscans}
+
+
+if __name__ == "__main__":
+    # python db_indexes.py [--dry-run]
+    import argparse
+    import os
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Apply MongoDB indexes and migrations")
+    parser.add_argument("--dry-run", action="store_true", help="only report missing indexes and COLLSCAN queries")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+    database = AsyncIOMotorClient(os.environ['MONGO_URL'])[os.environ['DB_NAME']]
+
+    async def main():
+        if args.dry_run:
+            report = await dry_run(database)
+            for collection, names in report["missing_indexes"].items():
+                print(f"missing index {collection}: {', '.join(names)}")
+            for index, keys in report["duplicate_keys"].items():
+                print(f"duplicate keys blocking {index}: {keys}")
+            for scan in report["collscans"]:
+                print(f"COLLSCAN {scan['collection']} filter={scan['filter']} sort={scan['sort']}")
+            if not report["missing_indexes"] and not report["collscans"]:
+                print("All registered indexes exist and no hot query does a COLLSCAN")
+        else:
+            await bootstrap(database)
+
+    asyncio.run(main())
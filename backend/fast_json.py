@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Opt-in: list endpoints serialize trusted Mongo documents directly instead of building models
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() == 'true'
+if FAST_JSON_RESPONSES and orjson is None:
+    logger.warning("FAST_JSON_RESPONSES is set but orjson is not installed, using the standard encoder")
+    FAST_JSON_RESPONSES = False
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson encodes datetime, UUID and enums natively, anything else
+    (pydantic models) goes through jsonable_encoder"""
+    if orjson is not None:
+        return orjson.dumps(content, default=jsonable_encoder)
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Mongo projection returning exactly a model's fields, so _id is dropped by the query"""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+
+def model_defaults(model: Type[BaseModel]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Filler giving a document the model's defaults for the fields it lacks, as model(**document) would"""
+    optional = {name: field for name, field in model.model_fields.items() if not field.is_required()}
+
+    def fill(document: Dict[str, Any]) -> Dict[str, Any]:
+        for name, field in optional.items():
+            if name not in document:
+                document[name] = field.get_default(call_default_factory=True)
+        return document
+    return fill
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: per-request CPU of the model path vs the fast path for list endpoints
+    import time
+    import uuid
+    from datetime import datetime, timedelta
+    from typing import List
+
+    from pydantic import TypeAdapter
+
+    os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    os.environ.setdefault('DB_NAME', 'benchmark')
+    from server import BlogPostSummary, BlogPost, Project
+
+    now = datetime.utcnow()
+
+    def project(i: int) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()), "title": f"Project {i}", "description": "A portfolio project " * 10,
+            "date": "2024", "status": "completed", "technologies": ["Python", "React", "MongoDB"],
+            "image_url": "https://example.com/image.png", "github_url": "https://github.com/example",
+            "live_url": None, "created_at": now - timedelta(minutes=i), "updated_at": now
+        }
+
+    def blog_post(i: int) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()), "title": f"Post {i}", "excerpt": "An excerpt " * 10,
+            "content": "Body text of the post. " * 300, "author": "Prabashwara", "published": True,
+            "tags": ["math", "physics"], "featured_image_url": None, "word_count": 1500, "reading_time": 8,
+            "created_at": now - timedelta(minutes=i), "updated_at": now
+        }
+
+    def model_path(model: Type[BaseModel], documents: List[Dict[str, Any]]) -> bytes:
+        # What the endpoints did: build models, then FastAPI revalidates against response_model and encodes
+        adapter = TypeAdapter(List[model])
+        models = [model(**document) for document in documents]
+        content = jsonable_encoder(adapter.dump_python(adapter.validate_python(models), mode="json"))
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def measure(function, *args) -> float:
+        runs = max(3, 2000 // len(args[-1]))
+        started = time.perf_counter()
+        for _ in range(runs):
+            function(*args)
+        return (time.perf_counter() - started) / runs * 1000
+
+    print(f"orjson: {'yes' if orjson is not None else 'no'}")
+    for name, model, factory in (("/api/projects", Project, project), ("/api/blog", BlogPost, blog_post),
+                                 ("/api/blog?summary=true", BlogPostSummary, blog_post)):
+        for count in (100, 1000, 10000):
+            documents = [factory(i) for i in range(count)]
+            if model is BlogPostSummary:
+                documents = [{k: v for k, v in d.items() if k in model.model_fields} for d in documents]
+            slow = measure(model_path, model, documents)
+            fast = measure(dumps, documents)
+            print(f"{name:<24} {count:>6} docs: model path {slow:9.2f} ms  fast path {fast:8.2f} ms  "
+                  f"({slow / fast:5.1f}x, {slow - fast:8.2f} ms CPU saved per request)")
@@ -0,0 +1,118 @@
+import ipaddress
+import logging
+import os
+from typing import Dict, Optional
+
+import geoip2.database
+import geoip2.errors
+import maxminddb
+
+logger = logging.getLogger(__name__)
+
+LOCAL_ADDRESSES = {'127.0.0.1', 'localhost', '::1'}
+
+
+def unknown_location() -> Dict[str, Optional[str]]:
+    """Location dict used whenever an address cannot be resolved"""
+    return {
+        'country': 'Unknown',
+        'city': 'Unknown',
+        'region': 'Unknown',
+        'latitude': None,
+        'longitude': None
+    }
+
+
+def local_location() -> Dict[str, Optional[str]]:
+    """Location dict for loopback addresses"""
+    return {
+        'country': 'Local',
+        'city': 'Local',
+        'region': 'Local',
+        'latitude': None,
+        'longitude': None
+    }
+
+
+def ip_prefix(ip_address: str) -> str:
+    """Normalize an address to its network prefix (/24 for IPv4, /48 for IPv6) for cache keys"""
+    try:
+        ip = ipaddress.ip_address(ip_address)
+    except ValueError:
+        return ip_address
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    prefix_length = 24 if ip.version == 4 else 48
+    return str(ipaddress.ip_network(f"{ip}/{prefix_length}", strict=False))
+
+
+def default_database_path() -> Optional[str]:
+    """Resolve the .mmdb file: GEOIP_DB_PATH first, then the bundled GeoLite2 City database"""
+    path = os.environ.get('GEOIP_DB_PATH')
+    if path:
+        return path
+    try:
+        from _maxminddb_geolite2 import geolite2_database
+        return geolite2_database()
+    except ImportError:
+        return None
+
+
+class GeoIPResolver:
+    """Offline IP geolocation backed by a memory-mapped MaxMind database"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or default_database_path()
+        self.reader = None
+        if not self.db_path:
+            logger.warning("No GeoIP database configured, locations will be 'Unknown'")
+            return
+        try:
+            self.reader = self._open_reader(self.db_path)
+            logger.info(f"GeoIP database loaded from {self.db_path}")
+        except (OSError, maxminddb.InvalidDatabaseError) as e:
+            logger.error(f"Error opening GeoIP database {self.db_path}: {e}")
+
+    @staticmethod
+    def _open_reader(db_path: str) -> geoip2.database.Reader:
+        # Prefer the C extension over the mmap; fall back to the pure Python mmap reader
+        try:
+            return geoip2.database.Reader(db_path, mode=maxminddb.MODE_MMAP_EXT)
+        except ValueError:
+            return geoip2.database.Reader(db_path, mode=maxminddb.MODE_MMAP)
+
+    def lookup(self, ip_address: str) -> Dict[str, Optional[str]]:
+        """Resolve an IP address to country/city/region/coordinates without network access"""
+        if ip_address in LOCAL_ADDRESSES:
+            return local_location()
+        if self.reader is None:
+            return unknown_location()
+
+        try:
+            ip = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return unknown_location()
+        if not ip.is_global:
+            return unknown_location()
+
+        try:
+            response = self.reader.city(ip)
+        except (geoip2.errors.AddressNotFoundError, ValueError):
+            return unknown_location()
+        except Exception as e:
+            logger.error(f"Error getting location for IP {ip_address}: {e}")
+            return unknown_location()
+
+        subdivision = response.subdivisions.most_specific
+        return {
+            'country': response.country.name or 'Unknown',
+            'city': response.city.name or 'Unknown',
+            'region': subdivision.name or 'Unknown',
+            'latitude': response.location.latitude,
+            'longitude': response.location.longitude
+        }
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
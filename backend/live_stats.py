@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = {
+    "visitor_sessions": ("total_visitors", "total_sessions"),
+    "page_views": ("total_page_views",),
+    "dev_tools_alerts": ("dev_tools_alerts",),
+}
+WINDOW_FIELDS = {"visitor_sessions": "sessions", "page_views": "page_views", "dev_tools_alerts": "dev_tools_alerts"}
+TOP_PAGES = 10
+RECENT_VISITORS = 20
+# The document fields record() reads, all other workers need to see of a flushed batch
+RECORD_FIELDS = {
+    "visitor_sessions": ("visitor_id", "country", "city", "browser", "total_time_spent", "session_start", "session_end"),
+    "page_views": ("page_url", "time_spent"),
+    "dev_tools_alerts": (),
+}
+
+
+def record_fields(collection: str, documents: Iterable[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """The part of a flushed batch record() uses, or None for collections it ignores"""
+    if collection not in RECORD_FIELDS:
+        return None
+    fields = RECORD_FIELDS[collection]
+    return [{field: document.get(field) for field in fields if field in document} for document in documents]
+
+
+class LiveStats:
+    """Analytics stats kept current from the ingest stream and pushed to admin Socket.IO clients.
+
+    One full calculation (compute) seeds the state and is repeated at most every resync_interval;
+    in between, buffered writes are folded in as they are flushed. Every emit_interval the
+    accumulated changes go to all admins as a single 'analytics_delta' event:
+    {"increments": {field: n, "windows": {name: {field: n}}}, "set": {field: value}}.
+    With several workers each one keeps its own state (fed every worker's batches over the cache
+    bus) and pushes only to the admins connected to it.
+    """
+
+    def __init__(self, sio, compute: Callable[[], Awaitable[Dict[str, Any]]], emit_interval: float = 2.0, resync_interval: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.sio = sio
+        self.compute = compute
+        self.emit_interval = emit_interval
+        self.resync_interval = resync_interval
+        self.clock = clock
+        self._state: Optional[Dict[str, Any]] = None
+        self._state_at = 0.0
+        self._pages: Dict[str, List[float]] = {}
+        self._resync: Optional[asyncio.Future] = None
+        self._delta = self._empty_delta()
+        self._admins: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.resyncs = 0
+        self.deltas = 0
+
+    @staticmethod
+    def _empty_delta() -> Dict[str, Any]:
+        return {"increments": {}, "set": {}}
+
+    def _stale(self) -> bool:
+        return self._state is None or self.clock() - self._state_at >= self.resync_interval
+
+    def expire(self):
+        """Force a full recalculation on next use"""
+        self._state_at = float("-inf")
+
+    async def current(self) -> Dict[str, Any]:
+        """The live stats, recomputed first if they are older than resync_interval"""
+        if self._stale():
+            await self._resynchronize()
+        return self._state
+
+    async def _resynchronize(self):
+        # Concurrent callers (GETs, joins, the emit loop) share one calculation
+        if self._resync is None:
+            self._resync = asyncio.ensure_future(self._load())
+        future = self._resync
+        try:
+            await asyncio.shield(future)
+        finally:
+            if self._resync is future and future.done():
+                self._resync = None
+
+    async def _load(self):
+        state = await self.compute()
+        self._state, self._state_at = state, self.clock()
+        self._pages = {page["page"]: [page["views"], page["views"] * page["avg_time_spent"]]
+                       for page in state.get("most_visited_pages", [])}
+        self._delta = self._empty_delta()
+        self.resyncs += 1
+
+    def _increment(self, field: str, amount: int):
+        self._state[field] = self._state.get(field, 0) + amount
+        increments = self._delta["increments"]
+        increments[field] = increments.get(field, 0) + amount
+
+    async def record(self, collection: str, documents: Iterable[Dict[str, Any]]):
+        """Flush listener: fold newly written analytics documents into the live state"""
+        if self._state is None or collection not in COUNTERS:
+            return
+        documents = list(documents)
+        count = len(documents)
+        for field in COUNTERS[collection]:
+            self._increment(field, count)
+
+        window_field = WINDOW_FIELDS[collection]
+        window_increments = self._delta["increments"].setdefault("windows", {})
+        for name, totals in self._state.get("windows", {}).items():
+            totals[window_field] = totals.get(window_field, 0) + count
+            window_increments.setdefault(name, {})
+            window_increments[name][window_field] = window_increments[name].get(window_field, 0) + count
+
+        if collection == "visitor_sessions":
+            self._state["active_sessions"] = self._state.get("active_sessions", 0) + sum(
+                1 for document in documents if document.get("session_end") is None
+            )
+            self._delta["set"]["active_sessions"] = self._state["active_sessions"]
+            self._record_visitors(documents)
+        elif collection == "page_views":
+            self._record_pages(documents)
+
+    def _record_visitors(self, documents: List[Dict[str, Any]]):
+        newest = sorted(documents, key=lambda document: document["session_start"], reverse=True)
+        recent = [
+            {
+                "visitor_id": document.get("visitor_id"),
+                "country": document.get("country", "Unknown"),
+                "city": document.get("city", "Unknown"),
+                "browser": document.get("browser", "Unknown"),
+                "time_spent": document.get("total_time_spent", 0),
+                "timestamp": document["session_start"]
+            } for document in newest
+        ]
+        self._state["recent_visitors"] = (recent + self._state.get("recent_visitors", []))[:RECENT_VISITORS]
+        self._delta["set"]["recent_visitors"] = self._state["recent_visitors"]
+
+    def _record_pages(self, documents: List[Dict[str, Any]]):
+        # Pages outside the seeded top list start from the views seen since the last resync
+        for document in documents:
+            totals = self._pages.setdefault(document.get("page_url") or "", [0, 0.0])
+            totals[0] += 1
+            totals[1] += document.get("time_spent", 0)
+        ranked = sorted(self._pages.items(), key=lambda item: item[1][0], reverse=True)[:TOP_PAGES]
+        top = [
+            {"page": page, "views": views, "avg_time_spent": round(time_spent / views, 2) if views else 0}
+            for page, (views, time_spent) in ranked
+        ]
+        if top != self._state.get("most_visited_pages"):
+            self._state["most_visited_pages"] = top
+            self._delta["set"]["most_visited_pages"] = top
+
+    def session_ended(self, previous: Dict[str, Any]):
+        """A session that was still open has ended"""
+        if self._state is not None and previous.get("session_end") is None:
+            self._state["active_sessions"] = max(self._state.get("active_sessions", 0) - 1, 0)
+            self._delta["set"]["active_sessions"] = self._state["active_sessions"]
+
+    async def join(self, sid: str):
+        """Register an admin socket and send it the full current stats"""
+        self._admins.add(sid)
+        await self.sio.emit("analytics_snapshot", jsonable_encoder(await self.current()), to=sid)
+
+    def leave(self, sid: str):
+        self._admins.discard(sid)
+
+    async def _emit(self, event: str, data: Dict[str, Any]):
+        # Addressed to this worker's admins rather than the room, which spans every worker
+        for sid in list(self._admins):
+            await self.sio.emit(event, data, to=sid)
+
+    async def push(self):
+        """Send the accumulated delta, or a fresh snapshot when a resync is due, to the connected admins"""
+        if not self._admins:
+            return
+        if self._stale():
+            await self._resynchronize()
+            await self._emit("analytics_snapshot", jsonable_encoder(self._state))
+            return
+        delta, self._delta = self._delta, self._empty_delta()
+        if delta["increments"] or delta["set"]:
+            await self._emit("analytics_delta", jsonable_encoder(delta))
+            self.deltas += 1
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.emit_interval)
+            try:
+                await self.push()
+            except Exception as e:
+                logger.error(f"Error pushing live analytics: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"admins": len(self._admins), "resyncs": self.resyncs, "deltas": self.deltas}
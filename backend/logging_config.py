@@ -0,0 +1,141 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# Logger name prefixes of the categories that are sampled in production mode
+CATEGORIES = {
+    "socket": ("socket", "socketio", "engineio"),
+    "request": ("uvicorn.access",),
+}
+
+# LogRecord attributes that aren't user-supplied extra fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def category_of(name: str) -> Optional[str]:
+    for category, prefixes in CATEGORIES.items():
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in prefixes):
+            return category
+    return None
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a random rates[category] share of each category's INFO and DEBUG records"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        category = category_of(record.name)
+        if category is None:
+            return True
+        rate = self.rates.get(category, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, plus any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        category = category_of(record.name)
+        if category is not None:
+            entry["category"] = category
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like the stock prepare(), but the traceback stays a separate field instead of joining the message
+        copy = logging.makeLogRecord(vars(record))
+        copy.msg, copy.args = record.getMessage(), None
+        if record.exc_info:
+            copy.exc_text = logging.Formatter().formatException(record.exc_info)
+        copy.exc_info = copy.stack_info = None
+        return copy
+
+
+def sample_rates() -> Dict[str, float]:
+    """Fraction of INFO/DEBUG records kept per category; warnings and errors are always kept"""
+    return {category: float(os.environ.get(f'LOG_SAMPLE_{category.upper()}', 0.1)) for category in CATEGORIES}
+
+
+def configure_logging(mode: str = "production") -> bool:
+    """Install the root logger handlers for a LOG_MODE and return whether it is debug mode.
+
+    'production': JSON lines written by a background thread, socket and request logs sampled.
+    'debug': the previous behaviour, plain text written on the event loop.
+    """
+    global _listener
+    level = getattr(logging, os.environ.get('LOG_LEVEL', 'INFO').upper(), logging.INFO)
+    if mode.lower() == "debug":
+        logging.basicConfig(level=level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        return True
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    # Sampled before enqueueing, so dropped records cost no more than the filter call
+    queue_handler.addFilter(SamplingFilter(sample_rates()))
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    # uvicorn installs its own stream handlers; route its records through the queue as well
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return False
+
+
+def library_logger(name: str, debug: bool) -> logging.Logger:
+    """Logger to hand to python-socketio / python-engineio.
+
+    Given logger=True/False they attach their own stderr StreamHandler, which bypasses the queue and
+    the JSON format and writes on the event loop; a logger object is used as is.
+    """
+    library = logging.getLogger(name)
+    library.setLevel(logging.INFO if debug else logging.WARNING)
+    return library
+
+
+def stop_logging():
+    """Write out queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(sort_value: Any, item_id: str) -> str:
+    """Opaque cursor for the (sort key, id) position of the last item on a page"""
+    if isinstance(sort_value, datetime):
+        value = {"dt": sort_value.isoformat()}
+    else:
+        value = {"v": sort_value}
+    raw = json.dumps([value, item_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, item_id = json.loads(raw)
+        sort_value = datetime.fromisoformat(value["dt"]) if "dt" in value else value["v"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+    if not isinstance(item_id, str):
+        raise InvalidCursor("Invalid pagination cursor")
+    return sort_value, item_id
+
+
+async def paginate(collection, query: Dict[str, Any], sort_key: str, limit: int, cursor: Optional[str] = None,
+                   build: Callable[[Dict[str, Any]], Any] = dict,
+                   projection: Optional[Dict[str, Any]] = None) -> Page:
+    """Keyset pagination in descending (sort_key, id) order.
+
+    Pages are selected with a range condition on the compound (sort_key, id) index rather than
+    skip(), so every page costs the same as the first, and at most limit + 1 documents are loaded.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        sort_value, item_id = decode_cursor(cursor)
+        query = {"$and": [query, {"$or": [
+            {sort_key: {"$lt": sort_value}},
+            {sort_key: sort_value, "id": {"$lt": item_id}}
+        ]}]}
+
+    documents = await collection.find(query, projection).sort(
+        [(sort_key, -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor(last.get(sort_key), last["id"])
+    return Page([build(document) for document in documents], next_cursor)
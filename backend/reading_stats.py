@@ -0,0 +1,20 @@
+import math
+import os
+import re
+from typing import Dict
+
+# Average adult silent reading speed for non-fiction
+WORDS_PER_MINUTE = int(os.environ.get('BLOG_WORDS_PER_MINUTE', 200))
+
+_MARKUP = re.compile(r"<[^>]+>|!?\[([^\]]*)\]\([^)]*\)")
+_WORD = re.compile(r"\w+(?:['’-]\w+)*")
+
+
+def reading_stats(content: str) -> Dict[str, int]:
+    """Word count and reading time (whole minutes, at least 1) of a post body in HTML or Markdown"""
+    text = _MARKUP.sub(lambda match: f" {match.group(1) or ''} ", content or "")
+    word_count = len(_WORD.findall(text))
+    return {
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)) if word_count else 0
+    }
@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, 100us to ~10s in steps of 30%: fine enough for histogram_quantile()
+# to put a p99 within a few percent
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(float(f"{0.0001 * 1.3 ** i:.6g}") for i in range(45))
+
+# Phases in Server-Timing order; 'app' is whatever remains of the total (handler code, validation)
+PHASES = ("db", "serialize", "compress")
+
+
+class RequestTiming:
+    """Wall time of the request in flight and the time spent in each phase so far.
+
+    MongoTimer reports to it from motor's executor threads, hence the lock.
+    """
+    __slots__ = ("started", "_phases", "_lock", "_commands", "_db_since")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._commands = 0
+        self._db_since = 0.0
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    def command_started(self):
+        with self._lock:
+            if not self._commands:
+                self._db_since = time.perf_counter()
+            self._commands += 1
+
+    def command_finished(self):
+        """The 'db' phase is the wall time with at least one command in flight, so commands run
+        concurrently (asyncio.gather) count once"""
+        with self._lock:
+            if not self._commands:
+                return
+            self._commands -= 1
+            if not self._commands:
+                self._phases["db"] = self._phases.get("db", 0.0) + time.perf_counter() - self._db_since
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        """Snapshot of the phase totals"""
+        with self._lock:
+            return dict(self._phases)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds.
+
+        'app' is the total minus the phases, clamped at 0 for the rare request whose database
+        commands overlap its own serialization.
+        """
+        total = time.perf_counter() - self.started
+        phases = self.phases
+        metrics = [f"{phase};dur={phases[phase] * 1000:.3f}" for phase in PHASES if phase in phases]
+        app = max(total - sum(phases.values()), 0.0)
+        return ", ".join(metrics + [f"app;dur={app * 1000:.3f}", f"total;dur={total * 1000:.3f}"])
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Charge the enclosed block to a phase of the current request (no-op outside a request)"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+class MongoTimer(monitoring.CommandListener):
+    """Charges MongoDB command round trips to the request that issued them.
+
+    Motor runs commands on executor threads with a copy of the caller's context, so the request's
+    RequestTiming is visible here.
+    """
+
+    def started(self, event):
+        timing = _current.get()
+        if timing is not None:
+            timing.command_started()
+
+    def succeeded(self, event):
+        self._finished()
+
+    def failed(self, event):
+        self._finished()
+
+    @staticmethod
+    def _finished():
+        timing = _current.get()
+        if timing is not None:
+            timing.command_finished()
+
+
+class TimedJSONResponse(JSONResponse):
+    """Default response class: counts rendering of response_model endpoints as serialization"""
+
+    def render(self, content: Any) -> bytes:
+        with phase("serialize"):
+            return super().render(content)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+def _labels(**labels: str) -> str:
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped))
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.9g}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+class RequestMetrics:
+    """Latency histograms per route template (total and per phase), rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._requests: Dict[Tuple[str, str, str], Histogram] = {}
+        self._phases: Dict[Tuple[str, str, str], Histogram] = {}
+
+    def record(self, method: str, route: str, status: int, total: float, phases: Dict[str, float]):
+        key = (method, route, str(status))
+        histogram = self._requests.get(key)
+        if histogram is None:
+            histogram = self._requests[key] = Histogram()
+        histogram.observe(total)
+        for name in PHASES:
+            key = (method, route, name)
+            histogram = self._phases.get(key)
+            if histogram is None:
+                histogram = self._phases[key] = Histogram()
+            histogram.observe(phases.get(name, 0.0))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(self._requests.items()):
+            lines += _histogram_lines("http_request_duration_seconds",
+                                      _labels(method=method, route=route, status=status), histogram)
+        lines += [
+            "# HELP http_request_phase_seconds Time per request spent in MongoDB, serialization and compression.",
+            "# TYPE http_request_phase_seconds histogram",
+        ]
+        for (method, route, name), histogram in sorted(self._phases.items()):
+            lines += _histogram_lines("http_request_phase_seconds",
+                                      _labels(method=method, route=route, phase=name), histogram)
+        return "\n".join(lines) + "\n"
+
+
+class TimingMiddleware:
+    """Times every HTTP request, adds a Server-Timing header and records it under its route template.
+
+    Requests that match no route share the 'unmatched' label, so probing random paths can't grow
+    the number of series.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            # The router records the matched route in the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            try:
+                self.metrics.record(scope["method"], template, status,
+                                    time.perf_counter() - timing.started, timing.phases)
+            except Exception as e:
+                logger.error(f"Error recording request timing: {e}")
@@ -0,0 +1,195 @@
+import asyncio
+import contextvars
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, NamedTuple, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import fast_json
+from compression import precompress
+from request_timing import phase
+
+logger = logging.getLogger(__name__)
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize a response exactly like FastAPI's default JSONResponse would (orjson in fast JSON mode)"""
+    with phase("serialize"):
+        if fast_json.FAST_JSON_RESPONSES:
+            return fast_json.dumps(content)
+        return JSONResponse(content=jsonable_encoder(content)).body
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+    encodings: Tuple[Tuple[str, bytes], ...] = ()  # (content coding, compressed body)
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+
+def last_modified_of(content: Any) -> Optional[datetime]:
+    """Newest updated_at of a model or document, or a list of them"""
+    items = content if isinstance(content, list) else [content]
+    stamps = [item.get("updated_at") if isinstance(item, dict) else getattr(item, "updated_at", None)
+              for item in items]
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def render_cached(content: Any, last_modified: Optional[datetime] = None,
+                  headers: Tuple[Tuple[str, str], ...] = ()) -> CachedBody:
+    """Serialize and compress a response once, together with its strong ETag (content hash),
+    Last-Modified and extra headers"""
+    body = render_json(content)
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    with phase("compress"):
+        encodings = precompress(body)
+    return CachedBody(body, etag, last_modified or last_modified_of(content), encodings, headers)
+
+
+def http_date(moment: datetime) -> str:
+    return format_datetime(moment.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no entity tags were sent (RFC 9110 13.2.2)"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # GET uses the weak comparison function, so W/ prefixes are ignored
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+class ResponseCache:
+    """Read-through cache of serialized response bodies (with validators) for public content endpoints.
+
+    Entries are grouped by tag (one per content collection) so an admin mutation drops every
+    variant of that content at once. Entries older than ttl (or tag_ttls[tag]) are served stale while a single
+    background task rebuilds them, and concurrent misses share one build, so neither expiry nor
+    invalidation can cause a thundering herd on MongoDB.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256, clock: Callable[[], float] = time.monotonic,
+                 tag_ttls: Optional[Dict[str, float]] = None):
+        self.ttl = ttl
+        self.tag_ttls = tag_ttls or {}
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[CachedBody, float]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._refreshes = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def get(self, tag: str, variant: Hashable, builder: Callable[[], Awaitable[CachedBody]]) -> CachedBody:
+        key = (tag, variant)
+        entry = self._entries.get(key)
+        if entry is not None:
+            body, created_at = entry
+            self._entries.move_to_end(key)
+            if self.clock() - created_at < self.tag_ttls.get(tag, self.ttl):
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh(key, builder)
+            return body
+
+        build = self._inflight.get(key)
+        if build is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            build = self._start(key, builder)
+        # The build runs in its own task: a caller that disconnects stops waiting, but the build
+        # carries on for everyone else coalesced on it
+        return await asyncio.shield(build)
+
+    def _start(self, key: Tuple[str, Hashable], builder: Callable[[], Awaitable[CachedBody]],
+               context: Optional[contextvars.Context] = None) -> asyncio.Task:
+        # Registered synchronously so a second miss or refresh in the same tick joins this build
+        task = asyncio.create_task(self._load(key, builder, self._generations.get(key[0], 0)), context=context)
+        self._inflight[key] = task
+        task.add_done_callback(self._build_done)
+        return task
+
+    async def _load(self, key: Tuple[str, Hashable], builder: Callable[[], Awaitable[CachedBody]],
+                    generation: int) -> CachedBody:
+        try:
+            body = await builder()
+            # Don't store a body that was built before an invalidation of the same tag
+            if self._generations.get(key[0], 0) == generation:
+                self._entries[key] = (body, self.clock())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return body
+        finally:
+            del self._inflight[key]
+
+    @staticmethod
+    def _build_done(task: asyncio.Task):
+        # Retrieve the exception even when every waiter has gone, so asyncio doesn't report it as lost
+        if not task.cancelled():
+            task.exception()
+
+    def _refresh(self, key: Tuple[str, Hashable], builder: Callable[[], Awaitable[CachedBody]]):
+        if key in self._inflight:
+            return
+        # A fresh context: the rebuild must not be charged to the request that found the entry stale
+        task = self._start(key, builder, context=contextvars.Context())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error refreshing cached response: {task.exception()}")
+
+    def invalidate(self, *tags: str):
+        """Drop every cached variant of the given content tags"""
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in [key for key in self._entries if key[0] == tag]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached response"""
+        self.invalidate(*{key[0] for key in self._entries}, *self._generations)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,149 @@
+import heapq
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MARKUP = re.compile(r"<[^>]+>")
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+SNIPPET_LENGTH = 200
+
+
+class SearchSource(NamedTuple):
+    collection: str
+    fields: Dict[str, float]  # field -> BM25F weight
+    snippet: str
+    query: Dict[str, Any] = {}
+    include: Callable[[Dict[str, Any]], bool] = lambda document: True
+
+
+# Searchable content: only published blog posts are public
+SOURCES: Dict[str, SearchSource] = {
+    "blog": SearchSource(
+        "blog_posts", {"title": 3.0, "tags": 2.0, "excerpt": 1.5, "content": 1.0}, "excerpt",
+        query={"published": True}, include=lambda document: bool(document.get("published"))
+    ),
+    "project": SearchSource("projects", {"title": 3.0, "technologies": 2.0, "description": 1.0}, "description"),
+    "timeline": SearchSource(
+        "timeline", {"title": 3.0, "tags": 2.0, "location": 1.0, "description": 1.0}, "description"
+    ),
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(_MARKUP.sub(" ", text).lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+class _Entry(NamedTuple):
+    length: float
+    terms: Tuple[str, ...]
+    title: str
+    snippet: str
+
+
+class SearchIndex:
+    """In-process inverted index over blog posts, projects and timeline events, ranked with BM25F.
+
+    Field weights scale term frequencies and document length, postings map term -> {doc: weighted tf},
+    and the CRUD handlers keep it current with add()/remove(); rebuild() reloads it from MongoDB.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Tuple[str, str], float]] = {}
+        self._documents: Dict[Tuple[str, str], _Entry] = {}
+        self._total_length = 0.0
+
+    def add(self, kind: str, document: Dict[str, Any]):
+        """Index (or re-index) a document; documents the source excludes are removed instead"""
+        source = SOURCES[kind]
+        key = (kind, document["id"])
+        self.remove(kind, document["id"])
+        if not source.include(document):
+            return
+
+        frequencies: Counter = Counter()
+        for field, weight in source.fields.items():
+            value = document.get(field) or ""
+            text = " ".join(value) if isinstance(value, list) else str(value)
+            for token in tokenize(text):
+                frequencies[token] += weight
+        length = sum(frequencies.values())
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[key] = frequency
+        snippet = " ".join(_MARKUP.sub(" ", str(document.get(source.snippet) or "")).split())
+        self._documents[key] = _Entry(length, tuple(frequencies), document.get("title", ""), snippet[:SNIPPET_LENGTH])
+        self._total_length += length
+
+    def remove(self, kind: str, document_id: str):
+        entry = self._documents.pop((kind, document_id), None)
+        if entry is None:
+            return
+        for term in entry.terms:
+            postings = self._postings[term]
+            del postings[(kind, document_id)]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= entry.length
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        terms = set(tokenize(query))
+        if not terms or not self._documents:
+            return []
+        kinds = set(kinds) if kinds else None
+        count = len(self._documents)
+        average_length = self._total_length / count or 1.0
+
+        scores: Dict[Tuple[str, str], float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                if kinds is not None and key[0] not in kinds:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._documents[key].length / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        results = []
+        for key, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            entry = self._documents[key]
+            results.append({
+                "kind": key[0],
+                "id": key[1],
+                "title": entry.title,
+                "snippet": entry.snippet,
+                "score": round(score, 4)
+            })
+        return results
+
+    async def rebuild(self, db):
+        """Reload every source from MongoDB into a fresh index, then swap it in"""
+        started = time.perf_counter()
+        fresh = SearchIndex(self.k1, self.b)
+        for kind, source in SOURCES.items():
+            fields = {"id", "title", source.snippet, *source.fields, *source.query}
+            projection = {"_id": 0, **{field: 1 for field in fields}}
+            async for document in db[source.collection].find(source.query, projection):
+                fresh.add(kind, document)
+        self._postings, self._documents, self._total_length = fresh._postings, fresh._documents, fresh._total_length
+        logger.info(f"Built search index with {len(self._documents)} documents "
+                    f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._documents),
+            "terms": len(self._postings),
+            "average_length": round(self._total_length / len(self._documents), 2) if self._documents else 0.0
+        }
@@ -1,14 +1,18 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, Response, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import socketio
+import asyncio
+import hmac
 import os
+import time
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from typing import List, Optional, Dict, Any, Union
 import uuid
 from datetime import datetime, timedelta
 import jwt
@@ -22,47 +26,162 @@ from analytics_models import (
     VisitorSessionCreate, PageViewCreate, DevToolsAlertCreate
 )
 from analytics_service import analytics_service
+from analytics_buffer import AnalyticsWriteBuffer, AnalyticsBufferFull
+from analytics_rollups import AnalyticsRollups
+from hyperloglog import UniqueVisitorSketches
+import db_indexes
+from response_cache import ResponseCache, render_cached, render_json, not_modified, http_date
+from fast_json import FAST_JSON_RESPONSES, model_defaults, model_projection
+from compression import CompressionMiddleware, encoded_etag, negotiate
+from token_verifier import TokenVerifier
+from alert_broadcaster import AlertBroadcaster
+from live_stats import LiveStats, record_fields
+from cache_bus import RESYNC, create_cache_bus
+from logging_config import configure_logging, library_logger
+from request_timing import MongoTimer, RequestMetrics, TimedJSONResponse, TimingMiddleware
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, Page, paginate
+from reading_stats import reading_stats
+from search_index import SOURCES as SEARCH_SOURCES, SearchIndex
+from content_facets import FACETS, ContentFacets
+from pymongo import ReturnDocument
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Configure logging: JSON through a background writer by default, LOG_MODE=debug for the verbose text logs
+DEBUG_LOGGING = configure_logging(os.environ.get('LOG_MODE', 'production'))
+logger = logging.getLogger(__name__)
+socket_logger = logging.getLogger("socket")
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# MongoTimer charges each command's round trip to the request that issued it (Server-Timing 'db')
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoTimer()])
 db = client[os.environ['DB_NAME']]
 
+# Write-behind buffer for analytics events
+analytics_buffer = AnalyticsWriteBuffer(
+    db,
+    max_size=int(os.environ.get('ANALYTICS_BUFFER_MAX_SIZE', 10000)),
+    batch_size=int(os.environ.get('ANALYTICS_BUFFER_BATCH_SIZE', 500)),
+    flush_interval=float(os.environ.get('ANALYTICS_BUFFER_FLUSH_INTERVAL', 1.0)),
+    overflow_policy=os.environ.get('ANALYTICS_BUFFER_OVERFLOW', 'drop'),
+    sample_rate=float(os.environ.get('ANALYTICS_BUFFER_SAMPLE_RATE', 0.1))
+)
+
+# Hourly/daily analytics counters, updated as buffered events are written
+analytics_rollups = AnalyticsRollups(db)
+analytics_buffer.add_flush_listener(analytics_rollups.record)
+unique_visitor_sketches = UniqueVisitorSketches(db)
+analytics_buffer.add_flush_listener(unique_visitor_sketches.record)
+
+# Serialized responses of the public content endpoints, invalidated by admin mutations
+response_cache = ResponseCache(
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 300)),
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256)),
+    # Every write to a section it embeds invalidates the bootstrap blob, so it never needs to expire
+    tag_ttls={"bootstrap": float("inf")}
+)
+# Later pages, non-default limits and filter combinations: any caller can make up new ones, so they
+# get their own small cache and can't evict the entries every visitor needs
+query_cache = ResponseCache(
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 300)),
+    max_entries=int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', 64))
+)
+
+# Full-text search over public content, maintained by the admin CRUD handlers
+search_index = SearchIndex()
+
+# Tag / technology / status counts for filter chips and tag clouds
+content_facets = ContentFacets(db)
+
+# Browsers and CDNs may store public content but must revalidate it (cheap 304s via ETag)
+CONTENT_CACHE_CONTROL = os.environ.get('CONTENT_CACHE_CONTROL', 'public, no-cache')
+
+# Redis-compatible server shared by several workers (uvicorn --workers N): Socket.IO rooms span
+# workers and per-process caches stay coherent. Unset runs everything in-process.
+SHARED_BACKEND_URL = os.environ.get('SHARED_BACKEND_URL')
+
+# Carries cache invalidations, search index updates, revocations and live stats between workers
+cache_bus = create_cache_bus(SHARED_BACKEND_URL)
+
 # Create Socket.IO server with enhanced CORS support
 sio = socketio.AsyncServer(
     async_mode='asgi',
+    client_manager=socketio.AsyncRedisManager(SHARED_BACKEND_URL) if SHARED_BACKEND_URL else None,
     cors_allowed_origins="*",
-    logger=True,
-    engineio_logger=True
+    # Per-packet logging only in debug mode; otherwise the libraries log warnings and errors
+    logger=library_logger("socketio.server", DEBUG_LOGGING),
+    engineio_logger=library_logger("engineio.server", DEBUG_LOGGING)
+)
+
+# Dev tools alerts reach only the admin room, coalesced per visitor session and emitted in batches
+alert_broadcaster = AlertBroadcaster(
+    sio,
+    room='admin',
+    coalesce_window=float(os.environ.get('DEV_TOOLS_ALERT_COALESCE_SECONDS', 30)),
+    emit_interval=float(os.environ.get('DEV_TOOLS_ALERT_EMIT_INTERVAL', 1.0))
+)
+
+# Analytics stats shared by every admin dashboard, updated from the ingest stream and pushed over Socket.IO
+live_stats = LiveStats(
+    sio,
+    lambda: analytics_service.calculate_analytics_stats(db),
+    emit_interval=float(os.environ.get('LIVE_STATS_EMIT_INTERVAL', 2.0)),
+    resync_interval=float(os.environ.get('LIVE_STATS_RESYNC_SECONDS', 60))
 )
+analytics_buffer.add_flush_listener(live_stats.record)
+
+async def publish_analytics(collection: str, documents: List[Dict[str, Any]]):
+    """Flush listener: share written batches with the other workers' live stats"""
+    fields = record_fields(collection, documents)
+    if fields:
+        cache_bus.publish("analytics", {"collection": collection, "documents": fields})
+
+analytics_buffer.add_flush_listener(publish_analytics)
+
+# Maximum number of page views accepted by a single batch request
+PAGE_VIEW_BATCH_MAX_SIZE = int(os.environ.get('PAGE_VIEW_BATCH_MAX_SIZE', 500))
 
 # JWT settings
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'default-secret-key')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_TIME = timedelta(hours=24)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Decoded admin tokens, cached until their exp, plus the logout revocation list
+token_verifier = TokenVerifier(
+    JWT_SECRET_KEY, [JWT_ALGORITHM],
+    max_entries=int(os.environ.get('JWT_CACHE_MAX_ENTRIES', 1024))
 )
-logger = logging.getLogger(__name__)
 
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    await db_indexes.bootstrap(db)
+    await search_index.rebuild(db)
+    await token_verifier.load_revocations(db)
+    await cache_bus.start()
+    await analytics_buffer.start()
+    await alert_broadcaster.start()
+    await live_stats.start()
     logger.info("Portfolio Backend API started")
     yield
     # Shutdown
+    await live_stats.stop()
+    await alert_broadcaster.stop()
+    await analytics_buffer.stop()
+    await cache_bus.stop()
     client.close()
     logger.info("Database connection closed")
 
 # Create the main app with lifespan support
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
+
+# Per-route latency histograms, exported at /api/metrics
+request_metrics = RequestMetrics()
+# Static bearer token for Prometheus scrapers, accepted by /api/metrics besides an admin JWT
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -196,9 +315,25 @@ class BlogPost(BaseModel):
     published: bool = False
     tags: List[str]
     featured_image_url: Optional[str] = None
+    word_count: int = 0
+    reading_time: int = 0  # minutes
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class BlogPostSummary(BaseModel):
+    """Blog card fields: everything but the post body"""
+    id: str
+    title: str
+    excerpt: str
+    author: str = "Prabashwara"
+    published: bool = False
+    tags: List[str]
+    featured_image_url: Optional[str] = None
+    word_count: int = 0
+    reading_time: int = 0  # minutes
+    created_at: datetime
+    updated_at: datetime
+
 class BlogPostCreate(BaseModel):
     title: str
     excerpt: str
@@ -230,6 +365,164 @@ class ContactInfoUpdate(BaseModel):
     social_links: Optional[Dict[str, str]] = None
 
 # Utility functions
+def enqueue_analytics(collection: str, document: Dict[str, Any]):
+    """Hand an analytics document to the write-behind buffer, answering 503 when it is full"""
+    try:
+        analytics_buffer.enqueue(collection, document)
+    except AnalyticsBufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Analytics ingestion is temporarily overloaded",
+            headers={"Retry-After": "1"}
+        )
+
+def list_cache(query: Dict[str, Any], limit: int, cursor: Optional[str]) -> ResponseCache:
+    """Cache for a list request: the unfiltered first page at the default limit is the shared one"""
+    if query or cursor is not None or limit != DEFAULT_PAGE_SIZE:
+        return query_cache
+    return response_cache
+
+async def cached_response(request: Request, tag: str, variant, loader,
+                          cache: Optional[ResponseCache] = None) -> Response:
+    """Serve a public content endpoint from the response cache, building it with loader() on a miss.
+
+    Conditional requests are answered with 304 from the cached validators without touching MongoDB.
+    """
+    async def build():
+        content = await loader()
+        if isinstance(content, Page):
+            return render_cached(content.items, headers=page_headers(content))
+        return render_cached(content)
+    cached = await (cache or response_cache).get(tag, variant, build)
+
+    body, etag = cached.body, cached.etag
+    headers = {"Cache-Control": CONTENT_CACHE_CONTROL, **dict(cached.headers)}
+    if cached.encodings:
+        # Compressed once at cache-fill time; pick the client's preferred one
+        headers["Vary"] = "Accept-Encoding"
+        encodings = dict(cached.encodings)
+        encoding = negotiate(request.headers.get("accept-encoding"), tuple(encodings))
+        if encoding is not None:
+            body, etag = encodings[encoding], encoded_etag(etag, encoding)
+            headers["Content-Encoding"] = encoding
+    headers["ETag"] = etag
+    if cached.last_modified is not None:
+        headers["Last-Modified"] = http_date(cached.last_modified)
+    if not_modified(request.headers, etag, cached.last_modified):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def fetch_page(collection, query: Dict[str, Any], sort_key: str, limit: int, cursor: Optional[str],
+                     model) -> Page:
+    """Keyset-paginate a collection newest first, answering 400 for a malformed cursor.
+
+    Documents are projected to the model's fields. In fast JSON mode they were validated on write
+    and are returned as plain dicts, with the model's defaults for fields older documents lack;
+    otherwise each one is built into the model.
+    """
+    build = model_defaults(model) if FAST_JSON_RESPONSES else (lambda document: model(**document))
+    try:
+        return await paginate(collection, query, sort_key, limit, cursor, build, model_projection(model))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def page_headers(page: Page) -> tuple:
+    """The opaque cursor of the next page travels in a header so list bodies keep their shape"""
+    return (("X-Next-Cursor", page.next_cursor),) if page.next_cursor else ()
+
+def paged(response: Response, page: Page):
+    if FAST_JSON_RESPONSES:
+        # Serialized directly, skipping FastAPI's response_model revalidation
+        return Response(content=render_json(page.items), media_type="application/json",
+                        headers=dict(page_headers(page)))
+    response.headers.update(dict(page_headers(page)))
+    return page.items
+
+async def update_document(collection, query: Dict[str, Any], update_data: Dict[str, Any],
+                          defaults: Optional[Dict[str, Any]] = None,
+                          return_document: ReturnDocument = ReturnDocument.AFTER) -> Optional[Dict[str, Any]]:
+    """Atomically $set fields in a single round trip and return the document after (or before) the update.
+
+    With defaults the document is upserted, seeded from defaults for every field not being set.
+    """
+    update = {"$set": update_data} if update_data else {}
+    if defaults is not None:
+        update["$setOnInsert"] = {k: v for k, v in defaults.items() if k not in update_data}
+    try:
+        return await collection.find_one_and_update(
+            query, update, upsert=defaults is not None, return_document=return_document
+        )
+    except DuplicateKeyError:
+        # Lost an upsert race on a unique index: the other writer's document exists now, so update it
+        return await collection.find_one_and_update(query, update, return_document=return_document)
+
+async def load_singleton(collection, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """The single document of a section collection, seeding it from defaults exactly once"""
+    document = await collection.find_one(db_indexes.SINGLETON)
+    if document is None:
+        document = await update_document(collection, db_indexes.SINGLETON, {}, defaults)
+    return document
+
+def facet_filter(**values) -> Dict[str, Any]:
+    """Mongo filter for facet query parameters: list values must all match (multikey), scalars exactly"""
+    query = {}
+    for field, value in values.items():
+        if isinstance(value, list):
+            query[field] = value[0] if len(value) == 1 else {"$all": sorted(set(value))}
+        elif value is not None:
+            query[field] = value
+    return query
+
+def facet_variant(query: Dict[str, Any]) -> tuple:
+    """Hashable response cache variant for a facet filter"""
+    return tuple(sorted((field, str(value)) for field, value in query.items()))
+
+def invalidate_cached(*tags: str):
+    response_cache.invalidate(*tags)
+    query_cache.invalidate(*tags)
+
+def invalidate_content(tag: str):
+    """Drop cached responses for a content collection and the bootstrap payload that embeds it"""
+    invalidate_cached(tag, "bootstrap")
+    cache_bus.publish("invalidate", {"tags": [tag, "bootstrap"]})
+
+def index_content(kind: str, document: Dict[str, Any]):
+    """Add or refresh a document in the search index, here and on the other workers"""
+    search_index.add(kind, document)
+    cache_bus.publish("search", {"kind": kind, "id": document["id"]})
+
+def unindex_content(kind: str, document_id: str):
+    search_index.remove(kind, document_id)
+    cache_bus.publish("search", {"kind": kind, "id": document_id, "removed": True})
+
+# Changes published by other workers
+async def apply_search_update(payload: Dict[str, Any]):
+    """Re-read the document the other worker indexed, so the message stays small"""
+    kind, document_id = payload["kind"], payload["id"]
+    document = None
+    if not payload.get("removed"):
+        document = await db[SEARCH_SOURCES[kind].collection].find_one({"id": document_id}, {"_id": 0})
+    if document is None:
+        search_index.remove(kind, document_id)
+    else:
+        search_index.add(kind, document)
+
+async def resync_caches(payload: Dict[str, Any]):
+    """Bus messages may have been lost: rebuild everything derived from MongoDB"""
+    response_cache.clear()
+    query_cache.clear()
+    live_stats.expire()
+    await search_index.rebuild(db)
+    await token_verifier.load_revocations(db)
+
+cache_bus.subscribe("invalidate", lambda payload: invalidate_cached(*payload["tags"]))
+cache_bus.subscribe("search", apply_search_update)
+cache_bus.subscribe("revoke", lambda payload: token_verifier.add_revocation(payload["digest"], payload["expires_at"]))
+cache_bus.subscribe("analytics", lambda payload: live_stats.record(payload["collection"], payload["documents"]))
+cache_bus.subscribe("session_ended", live_stats.session_ended)
+cache_bus.subscribe(RESYNC, resync_caches)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + JWT_EXPIRATION_TIME
@@ -237,9 +530,11 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    # async so FastAPI runs it on the event loop: no threadpool hop per admin request, and the
+    # verifier's cache is only ever touched from the loop
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = token_verifier.verify(credentials.credentials)
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
@@ -256,6 +551,16 @@ async def login(request: LoginRequest):
         return {"access_token": access_token, "token_type": "bearer"}
     raise HTTPException(status_code=401, detail="Incorrect username or password")
 
+@api_router.post("/auth/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the presented token for the rest of its lifetime"""
+    try:
+        digest, expires_at = await token_verifier.revoke(db, credentials.credentials)
+        cache_bus.publish("revoke", {"digest": digest, "expires_at": expires_at})
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return {"message": "Logged out"}
+
 @api_router.get("/auth/verify")
 async def verify_auth(current_user: str = Depends(verify_token)):
     return {"message": "Token is valid", "username": current_user}
@@ -273,104 +578,109 @@ async def create_status_check(input: StatusCheckCreate):
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    page = await fetch_page(db.status_checks, {}, "timestamp", limit, cursor, StatusCheck)
+    return paged(response, page)
 
 # About Section Management
 @api_router.get("/about", response_model=AboutSection)
-async def get_about():
-    about = await db.about.find_one()
-    if about:
-        return AboutSection(**about)
-    # Return default values if not found
-    default_about = {
-        "subtitle": "Mathematics Student",
-        "description": "My name is Rivibibu Prabashwara, and I'm currently studying in an advanced level in science stream.",
-        "context": "I study advanced mathematics, physics, chemistry, programming, networking, and cryptography-like subjects.",
-        "philosophy": "I believe in continuous learning and improvement. Every day brings new opportunities to discover, understand, and grow both intellectually and personally.",
-        "academic_focus": ["Mathematics (Pure & Applied)", "Physics & Chemistry", "Advanced Level Sciences"],
-        "technical_skills": ["Programming & Development", "Networking & Systems", "Cryptography & Security"]
-    }
-    about_obj = AboutSection(**default_about)
-    await db.about.insert_one(about_obj.dict())
-    return about_obj
+async def get_about(request: Request):
+    return await cached_response(request, "about", None, load_about)
+
+# Default content, seeded on first read or update
+DEFAULT_ABOUT = {
+    "subtitle": "Mathematics Student",
+    "description": "My name is Rivibibu Prabashwara, and I'm currently studying in an advanced level in science stream.",
+    "context": "I study advanced mathematics, physics, chemistry, programming, networking, and cryptography-like subjects.",
+    "philosophy": "I believe in continuous learning and improvement. Every day brings new opportunities to discover, understand, and grow both intellectually and personally.",
+    "academic_focus": ["Mathematics (Pure & Applied)", "Physics & Chemistry", "Advanced Level Sciences"],
+    "technical_skills": ["Programming & Development", "Networking & Systems", "Cryptography & Security"]
+}
+
+async def load_about() -> AboutSection:
+    return AboutSection(**await load_singleton(db.about, AboutSection(**DEFAULT_ABOUT).dict()))
 
 @api_router.put("/about", response_model=AboutSection)
 async def update_about(about_update: AboutSectionUpdate, current_user: str = Depends(verify_token)):
-    existing_about = await db.about.find_one()
-    if existing_about:
-        # Update existing
-        update_data = {k: v for k, v in about_update.dict().items() if v is not None}
-        update_data["updated_at"] = datetime.utcnow()
-        await db.about.update_one({}, {"$set": update_data})
-        updated_about = await db.about.find_one()
-        return AboutSection(**updated_about)
-    else:
-        # Create new
-        about_dict = about_update.dict()
-        about_dict = {k: v for k, v in about_dict.items() if v is not None}
-        about_obj = AboutSection(**about_dict)
-        await db.about.insert_one(about_obj.dict())
-        return about_obj
+    update_data = {k: v for k, v in about_update.dict().items() if v is not None}
+    update_data["updated_at"] = datetime.utcnow()
+    updated_about = await update_document(
+        db.about, db_indexes.SINGLETON, update_data, AboutSection(**DEFAULT_ABOUT).dict()
+    )
+    invalidate_content("about")
+    return AboutSection(**updated_about)
 
 # Experience Section Management
 @api_router.get("/experience", response_model=ExperienceSection)
-async def get_experience():
-    experience = await db.experience.find_one()
-    if experience:
-        return ExperienceSection(**experience)
-    # Return default values
-    default_experience = {
-        "technical_skills": [
-            {"name": "Mathematics", "level": 90},
-            {"name": "Physics", "level": 85},
-            {"name": "Chemistry", "level": 80},
-            {"name": "Programming", "level": 75},
-            {"name": "Networking", "level": 70},
-            {"name": "Cryptography", "level": 65}
-        ],
-        "current_status": {
-            "academic_level": "Advanced Level Student specializing in Mathematics and Science stream",
-            "learning_focus": "Currently exploring advanced mathematical concepts, theoretical physics, and practical applications in programming and cryptography.",
-            "future_goals": "Aspiring to contribute to mathematical research and develop innovative solutions in technology and science."
-        }
+async def get_experience(request: Request):
+    return await cached_response(request, "experience", None, load_experience)
+
+DEFAULT_EXPERIENCE = {
+    "technical_skills": [
+        {"name": "Mathematics", "level": 90},
+        {"name": "Physics", "level": 85},
+        {"name": "Chemistry", "level": 80},
+        {"name": "Programming", "level": 75},
+        {"name": "Networking", "level": 70},
+        {"name": "Cryptography", "level": 65}
+    ],
+    "current_status": {
+        "academic_level": "Advanced Level Student specializing in Mathematics and Science stream",
+        "learning_focus": "Currently exploring advanced mathematical concepts, theoretical physics, and practical applications in programming and cryptography.",
+        "future_goals": "Aspiring to contribute to mathematical research and develop innovative solutions in technology and science."
     }
-    exp_obj = ExperienceSection(**default_experience)
-    await db.experience.insert_one(exp_obj.dict())
-    return exp_obj
+}
+
+async def load_experience() -> ExperienceSection:
+    return ExperienceSection(**await load_singleton(db.experience, ExperienceSection(**DEFAULT_EXPERIENCE).dict()))
 
 @api_router.put("/experience", response_model=ExperienceSection)
 async def update_experience(exp_update: ExperienceSectionUpdate, current_user: str = Depends(verify_token)):
-    existing_exp = await db.experience.find_one()
-    if existing_exp:
-        update_data = {k: v for k, v in exp_update.dict().items() if v is not None}
-        update_data["updated_at"] = datetime.utcnow()
-        await db.experience.update_one({}, {"$set": update_data})
-        updated_exp = await db.experience.find_one()
-        return ExperienceSection(**updated_exp)
-    else:
-        exp_dict = exp_update.dict()
-        exp_dict = {k: v for k, v in exp_dict.items() if v is not None}
-        exp_obj = ExperienceSection(**exp_dict)
-        await db.experience.insert_one(exp_obj.dict())
-        return exp_obj
+    update_data = {k: v for k, v in exp_update.dict().items() if v is not None}
+    update_data["updated_at"] = datetime.utcnow()
+    updated_exp = await update_document(
+        db.experience, db_indexes.SINGLETON, update_data, ExperienceSection(**DEFAULT_EXPERIENCE).dict()
+    )
+    invalidate_content("experience")
+    return ExperienceSection(**updated_exp)
 
 # Projects Management
 @api_router.get("/projects", response_model=List[Project])
-async def get_projects():
-    projects = await db.projects.find().sort("created_at", -1).to_list(100)
-    return [Project(**project) for project in projects]
+async def get_projects(
+    request: Request,
+    technology: Optional[List[str]] = Query(None),
+    status: Optional[ProjectStatus] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """List projects, optionally only those using every given technology and/or with a status"""
+    query = facet_filter(technologies=technology, status=status.value if status else None)
+    return await cached_response(request, "projects", ("list", facet_variant(query), limit, cursor),
+                                 lambda: load_projects(limit, cursor, query), list_cache(query, limit, cursor))
+
+async def load_projects(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                        query: Optional[Dict[str, Any]] = None) -> Page:
+    return await fetch_page(db.projects, query or {}, "created_at", limit, cursor, Project)
 
 @api_router.post("/projects", response_model=Project)
 async def create_project(project: ProjectCreate, current_user: str = Depends(verify_token)):
     project_dict = project.dict()
     project_obj = Project(**project_dict)
     await db.projects.insert_one(project_obj.dict())
+    index_content("project", project_obj.dict())
+    await content_facets.apply("projects", None, project_obj.dict())
+    invalidate_content("projects")
     return project_obj
 
 @api_router.get("/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str):
+async def get_project(project_id: str, request: Request):
+    return await cached_response(request, "projects", ("item", project_id), lambda: load_project(project_id))
+
+async def load_project(project_id: str) -> Project:
     project = await db.projects.find_one({"id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -378,38 +688,62 @@ async def get_project(project_id: str):
 
 @api_router.put("/projects/{project_id}", response_model=Project)
 async def update_project(project_id: str, project_update: ProjectUpdate, current_user: str = Depends(verify_token)):
-    existing_project = await db.projects.find_one({"id": project_id})
-    if not existing_project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
     update_data = {k: v for k, v in project_update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
-    await db.projects.update_one({"id": project_id}, {"$set": update_data})
-    updated_project = await db.projects.find_one({"id": project_id})
+    # One atomic round trip; the pre-update document drives the facet count diff
+    existing_project = await update_document(
+        db.projects, {"id": project_id}, update_data, return_document=ReturnDocument.BEFORE
+    )
+    if not existing_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    updated_project = {**existing_project, **update_data}
+    index_content("project", updated_project)
+    await content_facets.apply("projects", existing_project, updated_project)
+    invalidate_content("projects")
     return Project(**updated_project)
 
 @api_router.delete("/projects/{project_id}")
 async def delete_project(project_id: str, current_user: str = Depends(verify_token)):
-    result = await db.projects.delete_one({"id": project_id})
-    if result.deleted_count == 0:
+    deleted = await db.projects.find_one_and_delete({"id": project_id})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    unindex_content("project", project_id)
+    await content_facets.apply("projects", deleted, None)
+    invalidate_content("projects")
     return {"message": "Project deleted successfully"}
 
 # Timeline Management
 @api_router.get("/timeline", response_model=List[TimelineEvent])
-async def get_timeline():
-    timeline = await db.timeline.find().sort("year", -1).to_list(100)
-    return [TimelineEvent(**event) for event in timeline]
+async def get_timeline(
+    request: Request,
+    tag: Optional[List[str]] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """List timeline events, optionally only those carrying every given tag"""
+    query = facet_filter(tags=tag)
+    return await cached_response(request, "timeline", ("list", facet_variant(query), limit, cursor),
+                                 lambda: load_timeline(limit, cursor, query), list_cache(query, limit, cursor))
+
+async def load_timeline(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                        query: Optional[Dict[str, Any]] = None) -> Page:
+    return await fetch_page(db.timeline, query or {}, "year", limit, cursor, TimelineEvent)
 
 @api_router.post("/timeline", response_model=TimelineEvent)
 async def create_timeline_event(event: TimelineEventCreate, current_user: str = Depends(verify_token)):
     event_dict = event.dict()
     event_obj = TimelineEvent(**event_dict)
     await db.timeline.insert_one(event_obj.dict())
+    index_content("timeline", event_obj.dict())
+    await content_facets.apply("timeline", None, event_obj.dict())
+    invalidate_content("timeline")
     return event_obj
 
 @api_router.get("/timeline/{event_id}", response_model=TimelineEvent)
-async def get_timeline_event(event_id: str):
+async def get_timeline_event(event_id: str, request: Request):
+    return await cached_response(request, "timeline", ("item", event_id), lambda: load_timeline_event(event_id))
+
+async def load_timeline_event(event_id: str) -> TimelineEvent:
     event = await db.timeline.find_one({"id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Timeline event not found")
@@ -417,39 +751,72 @@ async def get_timeline_event(event_id: str):
 
 @api_router.put("/timeline/{event_id}", response_model=TimelineEvent)
 async def update_timeline_event(event_id: str, event_update: TimelineEventUpdate, current_user: str = Depends(verify_token)):
-    existing_event = await db.timeline.find_one({"id": event_id})
-    if not existing_event:
-        raise HTTPException(status_code=404, detail="Timeline event not found")
-    
     update_data = {k: v for k, v in event_update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
-    await db.timeline.update_one({"id": event_id}, {"$set": update_data})
-    updated_event = await db.timeline.find_one({"id": event_id})
+    # One atomic round trip; the pre-update document drives the facet count diff
+    existing_event = await update_document(
+        db.timeline, {"id": event_id}, update_data, return_document=ReturnDocument.BEFORE
+    )
+    if not existing_event:
+        raise HTTPException(status_code=404, detail="Timeline event not found")
+    updated_event = {**existing_event, **update_data}
+    index_content("timeline", updated_event)
+    await content_facets.apply("timeline", existing_event, updated_event)
+    invalidate_content("timeline")
     return TimelineEvent(**updated_event)
 
 @api_router.delete("/timeline/{event_id}")
 async def delete_timeline_event(event_id: str, current_user: str = Depends(verify_token)):
-    result = await db.timeline.delete_one({"id": event_id})
-    if result.deleted_count == 0:
+    deleted = await db.timeline.find_one_and_delete({"id": event_id})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Timeline event not found")
+    unindex_content("timeline", event_id)
+    await content_facets.apply("timeline", deleted, None)
+    invalidate_content("timeline")
     return {"message": "Timeline event deleted successfully"}
 
 # Blog Management
-@api_router.get("/blog", response_model=List[BlogPost])
-async def get_blog_posts(published_only: bool = False):
-    query = {"published": True} if published_only else {}
-    posts = await db.blog_posts.find(query).sort("created_at", -1).to_list(100)
-    return [BlogPost(**post) for post in posts]
+@api_router.get("/blog", response_model=Union[List[BlogPost], List[BlogPostSummary]])
+async def get_blog_posts(
+    request: Request,
+    published_only: bool = False,
+    summary: bool = False,
+    tag: Optional[List[str]] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """List blog posts; summary=true omits the post bodies (fetch one with GET /blog/{post_id})"""
+    query = facet_filter(tags=tag)
+    return await cached_response(request, "blog", ("list", published_only, summary, facet_variant(query), limit, cursor),
+                                 lambda: load_blog_posts(published_only, limit, cursor, summary, query),
+                                 list_cache(query, limit, cursor))
+
+async def load_blog_posts(published_only: bool, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                          summary: bool = False, query: Optional[Dict[str, Any]] = None) -> Page:
+    query = dict(query or {})
+    if published_only:
+        query["published"] = True
+    if summary:
+        # Inclusion projection of the summary fields: post bodies never leave the database
+        return await fetch_page(db.blog_posts, query, "created_at", limit, cursor, BlogPostSummary)
+    return await fetch_page(db.blog_posts, query, "created_at", limit, cursor, BlogPost)
 
 @api_router.post("/blog", response_model=BlogPost)
 async def create_blog_post(post: BlogPostCreate, current_user: str = Depends(verify_token)):
     post_dict = post.dict()
+    post_dict.update(reading_stats(post.content))
     post_obj = BlogPost(**post_dict)
     await db.blog_posts.insert_one(post_obj.dict())
+    index_content("blog", post_obj.dict())
+    await content_facets.apply("blog", None, post_obj.dict())
+    invalidate_content("blog")
     return post_obj
 
 @api_router.get("/blog/{post_id}", response_model=BlogPost)
-async def get_blog_post(post_id: str):
+async def get_blog_post(post_id: str, request: Request):
+    return await cached_response(request, "blog", ("item", post_id), lambda: load_blog_post(post_id))
+
+async def load_blog_post(post_id: str) -> BlogPost:
     post = await db.blog_posts.find_one({"id": post_id})
     if not post:
         raise HTTPException(status_code=404, detail="Blog post not found")
@@ -457,23 +824,70 @@ async def get_blog_post(post_id: str):
 
 @api_router.put("/blog/{post_id}", response_model=BlogPost)
 async def update_blog_post(post_id: str, post_update: BlogPostUpdate, current_user: str = Depends(verify_token)):
-    existing_post = await db.blog_posts.find_one({"id": post_id})
-    if not existing_post:
-        raise HTTPException(status_code=404, detail="Blog post not found")
-    
     update_data = {k: v for k, v in post_update.dict().items() if v is not None}
+    if "content" in update_data:
+        update_data.update(reading_stats(update_data["content"]))
     update_data["updated_at"] = datetime.utcnow()
-    await db.blog_posts.update_one({"id": post_id}, {"$set": update_data})
-    updated_post = await db.blog_posts.find_one({"id": post_id})
+    # One atomic round trip; the pre-update document drives the facet count diff
+    existing_post = await update_document(
+        db.blog_posts, {"id": post_id}, update_data, return_document=ReturnDocument.BEFORE
+    )
+    if not existing_post:
+        raise HTTPException(status_code=404, detail="Blog post not found")
+    updated_post = {**existing_post, **update_data}
+    index_content("blog", updated_post)
+    await content_facets.apply("blog", existing_post, updated_post)
+    invalidate_content("blog")
     return BlogPost(**updated_post)
 
 @api_router.delete("/blog/{post_id}")
 async def delete_blog_post(post_id: str, current_user: str = Depends(verify_token)):
-    result = await db.blog_posts.delete_one({"id": post_id})
-    if result.deleted_count == 0:
+    deleted = await db.blog_posts.find_one_and_delete({"id": post_id})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
+    unindex_content("blog", post_id)
+    await content_facets.apply("blog", deleted, None)
+    invalidate_content("blog")
     return {"message": "Blog post deleted successfully"}
 
+# Search
+class SearchResult(BaseModel):
+    kind: str
+    id: str
+    title: str
+    snippet: str
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    took_ms: float
+
+@api_router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[List[str]] = Query(None),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Ranked (BM25) full-text search over published blog posts, projects and timeline events"""
+    if kind and not set(kind) <= set(SEARCH_SOURCES):
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(SEARCH_SOURCES)}")
+    started = time.perf_counter()
+    results = search_index.search(q, kind, limit)
+    return SearchResponse(query=q, results=results, took_ms=round((time.perf_counter() - started) * 1000, 3))
+
+# Facets
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+@api_router.get("/facets/{section}", response_model=Dict[str, List[FacetCount]])
+async def get_facets(section: str, request: Request):
+    """Value counts of the filterable fields of blog, projects or timeline (tag clouds, filter chips)"""
+    if section not in FACETS:
+        raise HTTPException(status_code=404, detail=f"section must be one of: {', '.join(FACETS)}")
+    return await cached_response(request, section, ("facets",), lambda: content_facets.counts(section))
+
 # Contact Form Submission Model
 class ContactFormSubmission(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -521,51 +935,88 @@ async def submit_contact_form(form_data: ContactFormCreate, request: Request):
         raise HTTPException(status_code=500, detail="Failed to submit contact form")
 
 @api_router.get("/contact/submissions", response_model=List[ContactFormSubmission])
-async def get_contact_submissions(current_user: str = Depends(verify_token), limit: int = 50):
+async def get_contact_submissions(
+    response: Response,
+    current_user: str = Depends(verify_token),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
     """Get contact form submissions (admin only)"""
     try:
-        submissions = await db.contact_submissions.find().sort("submitted_at", -1).limit(limit).to_list(limit)
-        return [ContactFormSubmission(**submission) for submission in submissions]
+        page = await fetch_page(db.contact_submissions, {}, "submitted_at", limit, cursor, ContactFormSubmission)
+        return paged(response, page)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting contact submissions: {e}")
         raise HTTPException(status_code=500, detail="Failed to get submissions")
 
 # Contact Info Management
 @api_router.get("/contact/info", response_model=ContactInfo)
-async def get_contact():
-    contact = await db.contact.find_one()
-    if contact:
-        return ContactInfo(**contact)
-    # Return default values
-    default_contact = {
-        "location": "Colombo, Sri Lanka",
-        "email": "support@mail.com",
-        "phone": "000",
-        "social_links": {
-            "github": "https://github.com",
-            "linkedin": "https://linkedin.com",
-            "twitter": "https://twitter.com"
-        }
+async def get_contact(request: Request):
+    return await cached_response(request, "contact", None, load_contact)
+
+DEFAULT_CONTACT = {
+    "location": "Colombo, Sri Lanka",
+    "email": "support@mail.com",
+    "phone": "000",
+    "social_links": {
+        "github": "https://github.com",
+        "linkedin": "https://linkedin.com",
+        "twitter": "https://twitter.com"
     }
-    contact_obj = ContactInfo(**default_contact)
-    await db.contact.insert_one(contact_obj.dict())
-    return contact_obj
+}
+
+async def load_contact() -> ContactInfo:
+    return ContactInfo(**await load_singleton(db.contact, ContactInfo(**DEFAULT_CONTACT).dict()))
 
 @api_router.put("/contact/info", response_model=ContactInfo)
 async def update_contact(contact_update: ContactInfoUpdate, current_user: str = Depends(verify_token)):
-    existing_contact = await db.contact.find_one()
-    if existing_contact:
-        update_data = {k: v for k, v in contact_update.dict().items() if v is not None}
-        update_data["updated_at"] = datetime.utcnow()
-        await db.contact.update_one({}, {"$set": update_data})
-        updated_contact = await db.contact.find_one()
-        return ContactInfo(**updated_contact)
-    else:
-        contact_dict = contact_update.dict()
-        contact_dict = {k: v for k, v in contact_dict.items() if v is not None}
-        contact_obj = ContactInfo(**contact_dict)
-        await db.contact.insert_one(contact_obj.dict())
-        return contact_obj
+    update_data = {k: v for k, v in contact_update.dict().items() if v is not None}
+    update_data["updated_at"] = datetime.utcnow()
+    updated_contact = await update_document(
+        db.contact, db_indexes.SINGLETON, update_data, ContactInfo(**DEFAULT_CONTACT).dict()
+    )
+    invalidate_content("contact")
+    return ContactInfo(**updated_contact)
+
+# Site Bootstrap
+class SiteBootstrap(BaseModel):
+    about: AboutSection
+    experience: ExperienceSection
+    projects: List[Project]
+    timeline: List[TimelineEvent]
+    blog: List[BlogPostSummary]
+    contact: ContactInfo
+    # Cursor of the second page of each list that has one, for its list endpoint (the blog's for
+    # /blog?published_only=true&summary=true)
+    next_cursors: Dict[str, str] = {}
+
+async def load_bootstrap() -> SiteBootstrap:
+    about, experience, projects, timeline, blog, contact = await asyncio.gather(
+        load_about(),
+        load_experience(),
+        load_projects(),
+        load_timeline(),
+        load_blog_posts(True, summary=True),
+        load_contact()
+    )
+    # First page of each list; clients follow next_cursors on the list endpoints for the rest
+    pages = {"projects": projects, "timeline": timeline, "blog": blog}
+    return SiteBootstrap(
+        about=about,
+        experience=experience,
+        projects=projects.items,
+        timeline=timeline.items,
+        blog=blog.items,
+        contact=contact,
+        next_cursors={name: page.next_cursor for name, page in pages.items() if page.next_cursor}
+    )
+
+@api_router.get("/bootstrap", response_model=SiteBootstrap)
+async def get_bootstrap(request: Request):
+    """Every public section in one precompressed payload, rebuilt only after an admin mutation"""
+    return await cached_response(request, "bootstrap", None, load_bootstrap)
 
 # ================================
 # ANALYTICS ENDPOINTS
@@ -582,7 +1033,7 @@ async def create_visitor_session(session_data: VisitorSessionCreate, request: Re
             client_ip = forwarded_for.split(',')[0].strip()
         
         # Get location data
-        location_data = analytics_service.get_location_data(client_ip)
+        location_data = await analytics_service.lookup_location(client_ip)
         
         # Parse user agent
         user_agent_data = analytics_service.parse_user_agent(session_data.user_agent)
@@ -594,10 +1045,16 @@ async def create_visitor_session(session_data: VisitorSessionCreate, request: Re
         session_dict['ip_address'] = client_ip
         
         session_obj = VisitorSession(**session_dict)
-        await db.visitor_sessions.insert_one(session_obj.dict())
+        # Written directly rather than buffered: ending the session updates this document, possibly
+        # on another worker, so it must exist by the time the session id reaches the client
+        session_doc = session_obj.dict()
+        await db.visitor_sessions.insert_one(session_doc)
+        await analytics_buffer.notify("visitor_sessions", [session_doc])
         
         return {"status": "success", "session_id": session_obj.id}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating visitor session: {e}")
         raise HTTPException(status_code=500, detail="Failed to create session")
@@ -607,13 +1064,64 @@ async def create_page_view(page_data: PageViewCreate):
     """Record a page view"""
     try:
         page_obj = PageView(**page_data.dict())
-        await db.page_views.insert_one(page_obj.dict())
+        enqueue_analytics("page_views", page_obj.dict())
         return {"status": "success", "page_view_id": page_obj.id}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating page view: {e}")
         raise HTTPException(status_code=500, detail="Failed to record page view")
 
+@api_router.post("/analytics/pageview/batch")
+async def create_page_views_batch(items: List[Dict[str, Any]]):
+    """Record several page views with a single unordered insert_many"""
+    if len(items) > PAGE_VIEW_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size exceeds the limit of {PAGE_VIEW_BATCH_MAX_SIZE} page views"
+        )
+
+    results: List[Dict[str, Any]] = []
+    documents = []
+    document_indexes = []
+    for index, item in enumerate(items):
+        try:
+            page_obj = PageView(**PageViewCreate(**item).dict())
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_input=False)
+            results.append({"index": index, "status": "error", "error": errors})
+            continue
+        results.append({"index": index, "status": "success", "page_view_id": page_obj.id})
+        documents.append(page_obj.dict())
+        document_indexes.append(index)
+
+    if documents:
+        written = documents
+        try:
+            await db.page_views.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed = set()
+            for write_error in e.details.get("writeErrors", []):
+                failed.add(write_error["index"])
+                result = results[document_indexes[write_error["index"]]]
+                result.pop("page_view_id", None)
+                result.update({"status": "error", "error": write_error.get("errmsg", "Write failed")})
+            written = [document for i, document in enumerate(documents) if i not in failed]
+        except Exception as e:
+            logger.error(f"Error creating page view batch: {e}")
+            raise HTTPException(status_code=500, detail="Failed to record page views")
+        # Same rollups, live stats and cache bus fan-out as buffered single page views
+        await analytics_buffer.notify("page_views", written)
+
+    inserted = sum(1 for result in results if result["status"] == "success")
+    return {
+        "status": "success" if inserted == len(results) else "partial",
+        "inserted": inserted,
+        "failed": len(results) - inserted,
+        "results": results
+    }
+
 @api_router.post("/analytics/dev-tools-alert")
 async def create_dev_tools_alert(alert_data: DevToolsAlertCreate, request: Request):
     """Record dev tools detection"""
@@ -625,7 +1133,7 @@ async def create_dev_tools_alert(alert_data: DevToolsAlertCreate, request: Reque
             client_ip = forwarded_for.split(',')[0].strip()
         
         # Get location data
-        location_data = analytics_service.get_location_data(client_ip)
+        location_data = await analytics_service.lookup_location(client_ip)
         
         # Parse user agent
         user_agent_data = analytics_service.parse_user_agent(alert_data.user_agent)
@@ -637,10 +1145,11 @@ async def create_dev_tools_alert(alert_data: DevToolsAlertCreate, request: Reque
         alert_dict['ip_address'] = client_ip
         
         alert_obj = DevToolsAlert(**alert_dict)
-        await db.dev_tools_alerts.insert_one(alert_obj.dict())
+        enqueue_analytics("dev_tools_alerts", alert_obj.dict())
         
-        # Emit real-time notification via WebSocket
-        await sio.emit('dev_tools_alert', {
+        # Real-time notification for admins (batched, repeats coalesced)
+        alert_broadcaster.publish((alert_obj.visitor_id, alert_obj.session_id), {
+            'alert_id': alert_obj.id,
             'visitor_id': alert_obj.visitor_id,
             'page_url': alert_obj.page_url,
             'location': f"{alert_obj.city}, {alert_obj.country}",
@@ -651,6 +1160,8 @@ async def create_dev_tools_alert(alert_data: DevToolsAlertCreate, request: Reque
         
         return {"status": "success", "alert_id": alert_obj.id}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating dev tools alert: {e}")
         raise HTTPException(status_code=500, detail="Failed to record alert")
@@ -659,15 +1170,21 @@ async def create_dev_tools_alert(alert_data: DevToolsAlertCreate, request: Reque
 async def end_visitor_session(session_id: str, total_time: int):
     """End a visitor session and record total time"""
     try:
-        await db.visitor_sessions.update_one(
+        previous = await db.visitor_sessions.find_one_and_update(
             {"id": session_id},
             {
                 "$set": {
                     "session_end": datetime.utcnow(),
                     "total_time_spent": total_time
                 }
-            }
+            },
+            projection={"_id": 0, "session_start": 1, "session_end": 1, "total_time_spent": 1},
+            return_document=ReturnDocument.BEFORE
         )
+        if previous:
+            await analytics_rollups.record_session_end(previous, total_time)
+            live_stats.session_ended(previous)
+            cache_bus.publish("session_ended", previous)
         return {"status": "success"}
     
     except Exception as e:
@@ -678,20 +1195,73 @@ async def end_visitor_session(session_id: str, total_time: int):
 async def get_analytics_stats(current_user: str = Depends(verify_token)):
     """Get comprehensive analytics statistics"""
     try:
-        stats = await analytics_service.calculate_analytics_stats(db)
+        stats = await live_stats.current()
         return AnalyticsStats(**stats)
     
     except Exception as e:
         logger.error(f"Error getting analytics stats: {e}")
         raise HTTPException(status_code=500, detail="Failed to get analytics")
 
+@api_router.get("/analytics/unique-visitors")
+async def get_unique_visitors(
+    current_user: str = Depends(verify_token),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    exact: Optional[bool] = None
+):
+    """Count unique visitors for an inclusive range of days (HyperLogLog estimate unless exact=true)"""
+    if exact is None:
+        exact = analytics_service.unique_visitors_mode == "exact"
+    try:
+        count = await analytics_service.count_unique_visitors(db, start_date, end_date, exact)
+        return {"unique_visitors": count, "mode": "exact" if exact else "hll"}
+    except Exception as e:
+        logger.error(f"Error counting unique visitors: {e}")
+        raise HTTPException(status_code=500, detail="Failed to count unique visitors")
+
+@api_router.get("/metrics")
+async def get_metrics(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))):
+    """Request latency histograms in Prometheus text format, for an admin or the METRICS_TOKEN scraper"""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if not (METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode())):
+        await verify_token(credentials)
+    return Response(content=request_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api_router.get("/analytics/cache-stats")
+async def get_cache_stats(current_user: str = Depends(verify_token)):
+    """Get hit/miss/eviction counters for the in-process caches"""
+    return {
+        "geolocation": analytics_service.location_cache.stats(),
+        "user_agent": analytics_service.user_agent_parser.stats(),
+        "responses": response_cache.stats(),
+        "response_queries": query_cache.stats(),
+        "search": search_index.stats(),
+        "tokens": token_verifier.stats(),
+        "alerts": alert_broadcaster.stats(),
+        "live_stats": live_stats.stats(),
+        "cache_bus": cache_bus.stats()
+    }
+
+@api_router.get("/analytics/buffer-stats")
+async def get_buffer_stats(current_user: str = Depends(verify_token)):
+    """Get depth, overflow and flush-latency metrics for the analytics write buffer"""
+    return analytics_buffer.metrics()
+
 @api_router.get("/analytics/dev-tools-alerts")
-async def get_dev_tools_alerts(current_user: str = Depends(verify_token), limit: int = 50):
+async def get_dev_tools_alerts(
+    response: Response,
+    current_user: str = Depends(verify_token),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
     """Get recent dev tools alerts"""
     try:
-        alerts = await db.dev_tools_alerts.find().sort("timestamp", -1).limit(limit).to_list(limit)
-        return [DevToolsAlert(**alert) for alert in alerts]
+        page = await fetch_page(db.dev_tools_alerts, {}, "timestamp", limit, cursor, DevToolsAlert)
+        return paged(response, page)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting dev tools alerts: {e}")
         raise HTTPException(status_code=500, detail="Failed to get alerts")
@@ -719,12 +1289,13 @@ async def resolve_dev_tools_alert(alert_id: str, current_user: str = Depends(ver
 @sio.event
 async def connect(sid, environ):
     """Handle client connection"""
-    print(f"Client {sid} connected")
+    socket_logger.info("Client connected", extra={"sid": sid})
 
 @sio.event
 async def disconnect(sid):
     """Handle client disconnection"""
-    print(f"Client {sid} disconnected")
+    socket_logger.info("Client disconnected", extra={"sid": sid})
+    live_stats.leave(sid)
 
 @sio.event
 async def join_admin(sid, data):
@@ -732,11 +1303,12 @@ async def join_admin(sid, data):
     token = data.get('token')
     if token:
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            payload = token_verifier.verify(token)
             username = payload.get("sub")
             if username == ADMIN_USERNAME:
                 await sio.enter_room(sid, 'admin')
-                print(f"Admin {sid} joined admin room")
+                socket_logger.info("Admin joined admin room", extra={"sid": sid})
+                await live_stats.join(sid)
         except jwt.PyJWTError:
             pass
 
@@ -746,6 +1318,9 @@ app.include_router(api_router)
 # Mount Socket.IO
 socket_app = socketio.ASGIApp(sio, other_asgi_app=app)
 
+# gzip / brotli for dynamic responses (cached content arrives precompressed)
+app.add_middleware(CompressionMiddleware)
+
 # Enhanced CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -756,5 +1331,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Server-Timing header and latency histograms; added last so it is the outermost layer and
+# CORS and compression are included
+app.add_middleware(TimingMiddleware, metrics=request_metrics)
+
 # Export the socket app for use with uvicorn
 app = socket_app
\ No newline at end of file
@@ -0,0 +1,85 @@
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+import jwt
+
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+REVOKED_TOKENS = "revoked_tokens"
+
+
+def token_digest(token: str) -> str:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TokenRevoked(jwt.InvalidTokenError):
+    """Raised for a token that was revoked by logout"""
+
+
+class TokenVerifier:
+    """JWT verification with a bounded cache of decoded payloads and a revocation list.
+
+    A token is fully decoded (signature and claims) once; later requests with the same token are
+    answered from the cache, keyed by the token's digest, until its exp. Revoked digests are kept
+    until their token would have expired anyway, in memory and in MongoDB so restarts keep them.
+    """
+
+    def __init__(self, secret: str, algorithms: List[str], max_entries: int = 1024,
+                 clock: Callable[[], float] = time.time):
+        self.secret = secret
+        self.algorithms = algorithms
+        self.clock = clock
+        self.cache = LRUCache(max_entries=max_entries, clock=clock)
+        self._revoked: Dict[str, float] = {}
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Decoded payload of a valid token; raises jwt.PyJWTError otherwise"""
+        digest = token_digest(token)
+        if digest in self._revoked:
+            raise TokenRevoked("Token has been revoked")
+        payload = self.cache.get(digest)
+        if payload is None:
+            payload = jwt.decode(token, self.secret, algorithms=self.algorithms)
+            expires_at = payload.get("exp")
+            # Entries expire with the token, so a cached payload is never served past its exp
+            self.cache.set(digest, payload, ttl=expires_at - self.clock() if expires_at is not None else None)
+        return payload
+
+    def _prune(self):
+        now = self.clock()
+        for digest in [digest for digest, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[digest]
+
+    def add_revocation(self, digest: str, expires_at: float):
+        """Record a revocation made elsewhere (another worker) in this process"""
+        self._prune()
+        self._revoked[digest] = expires_at
+        self.cache.pop(digest)
+
+    async def revoke(self, db, token: str) -> Tuple[str, float]:
+        """Revoke a token until its exp (logout); returns its digest and expiry"""
+        payload = self.verify(token)
+        digest = token_digest(token)
+        expires_at = payload.get("exp", self.clock() + 365 * 24 * 3600)
+        self.add_revocation(digest, expires_at)
+        await db[REVOKED_TOKENS].update_one(
+            {"_id": digest},
+            {"$set": {"expires_at": datetime.utcfromtimestamp(expires_at)}},
+            upsert=True
+        )
+        return digest, expires_at
+
+    async def load_revocations(self, db):
+        """Startup hook: load revocations that haven't expired yet (a TTL index drops the rest)"""
+        now = datetime.utcfromtimestamp(self.clock())
+        async for document in db[REVOKED_TOKENS].find({"expires_at": {"$gt": now}}):
+            self._revoked[document["_id"]] = (document["expires_at"] - datetime(1970, 1, 1)).total_seconds()
+        logger.info(f"Loaded {len(self._revoked)} revoked tokens")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "revoked": len(self._revoked)}
@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from user_agents import parse as parse_user_agent
+
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Windows NT kernel versions as reported by ua-parser
+WINDOWS_VERSIONS = {'10.0': '10', '6.3': '8.1', '6.2': '8', '6.1': '7'}
+
+_WINDOWS = r'\(Windows NT (?P<nt>10\.0|6\.[123])(?:; Win64; x64|; WOW64)?'
+_MAC = r'\(Macintosh; Intel Mac OS X (?P<mac>\d+(?:[_.]\d+){1,2})'
+_LINUX = r'\(X11; Linux x86_64'
+_CHROMIUM = (r' AppleWebKit/537\.36 \(KHTML, like Gecko\) Chrome/(?P<chrome>\d+(?:\.\d+){3})'
+             r' Safari/537\.36(?: Edg/(?P<edge>\d+(?:\.\d+){3}))?')
+_FIREFOX = r'; rv:\d+\.\d+\) Gecko/20100101 Firefox/(?P<firefox>\d+\.\d+(?:\.\d+)?)'
+
+
+def version_string(version: str) -> str:
+    """Trim a dotted version to major.minor.patch, matching ua-parser's version_string"""
+    return '.'.join(version.split('.')[:3])
+
+
+def _browser(match: re.Match) -> str:
+    groups = match.groupdict()
+    if groups.get('edge'):
+        return f"Edge {version_string(groups['edge'])}"
+    if groups.get('chrome'):
+        return f"Chrome {version_string(groups['chrome'])}"
+    if groups.get('firefox'):
+        return f"Firefox {version_string(groups['firefox'])}"
+    return f"Safari {version_string(groups['safari'])}"
+
+
+def _windows(match: re.Match) -> Dict[str, str]:
+    return {
+        'browser': _browser(match),
+        'device': 'Windows',
+        'os': f"Windows {WINDOWS_VERSIONS[match.group('nt')]}"
+    }
+
+
+def _mac(match: re.Match) -> Dict[str, str]:
+    return {
+        'browser': _browser(match),
+        'device': 'Apple Mac',
+        'os': f"Mac OS X {match.group('mac').replace('_', '.')}"
+    }
+
+
+def _linux(match: re.Match) -> Dict[str, str]:
+    return {
+        'browser': _browser(match),
+        'device': 'Linux',
+        'os': 'Linux '
+    }
+
+
+def _ios(match: re.Match) -> Dict[str, str]:
+    if match.group('crios'):
+        browser = f"Chrome Mobile iOS {version_string(match.group('crios'))}"
+    else:
+        browser = f"Mobile Safari {version_string(match.group('safari'))}"
+    return {
+        'browser': browser,
+        'device': f"Apple {match.group('device')}",
+        'os': f"iOS {match.group('ios').replace('_', '.')}"
+    }
+
+
+def _android(match: re.Match) -> Dict[str, str]:
+    return {
+        'browser': f"Chrome Mobile {version_string(match.group('chrome'))}",
+        'device': 'Generic_Android K',
+        'os': 'Android 10'
+    }
+
+
+# Precompiled patterns for the dominant browser/platform combinations. Each pattern is anchored
+# on both ends so any extra product token (OPR/, YaBrowser/, SamsungBrowser/...) falls through
+# to the full ua-parser cascade.
+FAST_PATTERNS: List[Tuple[re.Pattern, Callable[[re.Match], Dict[str, str]]]] = [
+    (re.compile(r'Mozilla/5\.0 ' + _WINDOWS + r'\)' + _CHROMIUM), _windows),
+    (re.compile(r'Mozilla/5\.0 ' + _WINDOWS + _FIREFOX), _windows),
+    (re.compile(r'Mozilla/5\.0 ' + _MAC + r'\)' + _CHROMIUM), _mac),
+    (re.compile(r'Mozilla/5\.0 ' + _MAC + r'\) AppleWebKit/605\.1\.15 \(KHTML, like Gecko\)'
+                r' Version/(?P<safari>\d+(?:\.\d+){1,2}) Safari/605\.1\.15'), _mac),
+    (re.compile(r'Mozilla/5\.0 ' + _MAC + _FIREFOX), _mac),
+    (re.compile(r'Mozilla/5\.0 ' + _LINUX + r'\)' + _CHROMIUM), _linux),
+    (re.compile(r'Mozilla/5\.0 ' + _LINUX + _FIREFOX), _linux),
+    (re.compile(r'Mozilla/5\.0 \((?P<device>iPhone); CPU iPhone OS (?P<ios>\d+(?:_\d+){1,2}) like Mac OS X\)'
+                r' AppleWebKit/605\.1\.15 \(KHTML, like Gecko\)'
+                r' (?:Version/(?P<safari>\d+(?:\.\d+){1,2})|CriOS/(?P<crios>\d+(?:\.\d+){3}))'
+                r' Mobile/15E148 Safari/604\.1'), _ios),
+    (re.compile(r'Mozilla/5\.0 \(Linux; Android 10; K\) AppleWebKit/537\.36 \(KHTML, like Gecko\)'
+                r' Chrome/(?P<chrome>\d+(?:\.\d+){3}) Mobile Safari/537\.36'), _android),
+]
+
+
+def unknown_user_agent() -> Dict[str, str]:
+    return {
+        'browser': 'Unknown',
+        'device': 'Unknown',
+        'os': 'Unknown'
+    }
+
+
+def fast_parse(user_agent: str) -> Optional[Dict[str, str]]:
+    """Parse the common desktop/mobile user agents with precompiled patterns, or return None"""
+    for pattern, build in FAST_PATTERNS:
+        match = pattern.fullmatch(user_agent)
+        if match:
+            return build(match)
+    return None
+
+
+def full_parse(user_agent: str) -> Dict[str, str]:
+    """Parse a user agent with the complete ua-parser regex cascade"""
+    try:
+        ua = parse_user_agent(user_agent)
+        return {
+            'browser': f"{ua.browser.family} {ua.browser.version_string}",
+            'device': f"{ua.device.brand} {ua.device.model}".strip() if ua.device.brand else ua.os.family,
+            'os': f"{ua.os.family} {ua.os.version_string}"
+        }
+    except Exception as e:
+        logger.error(f"Error parsing user agent: {e}")
+        return unknown_user_agent()
+
+
+class UserAgentParser:
+    """Memoized user agent parsing with a compiled fast path in front of ua-parser"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.cache = LRUCache(max_entries=max_entries)
+        self.fast_path_hits = 0
+
+    @staticmethod
+    def cache_key(user_agent: str) -> bytes:
+        return hashlib.blake2b(user_agent.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def parse(self, user_agent: str) -> Dict[str, str]:
+        key = self.cache_key(user_agent)
+        result = self.cache.get(key)
+        if result is None:
+            result = fast_parse(user_agent)
+            if result is not None:
+                self.fast_path_hits += 1
+            else:
+                result = full_parse(user_agent)
+            self.cache.set(key, result)
+        return dict(result)
+
+    def stats(self) -> Dict:
+        return {**self.cache.stats(), "fast_path_hits": self.fast_path_hits}
+
+
+if __name__ == '__main__':
+    # Micro-benchmark: python user_agent_parser.py
+    import itertools
+    import timeit
+
+    templates = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.{}.0 Safari/537.36",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.{}.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0.{}",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.{} Safari/605.1.15",
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_1_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1.{} Mobile/15E148 Safari/604.1",
+        "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.{}.0 Mobile Safari/537.36",
+    ]
+    rounds = 300
+    # ua-parser keeps its own cache, so the uncached numbers use a fresh build number every call
+    counter = itertools.count()
+    fresh = lambda: [template.format(next(counter)) for template in templates]
+    seen = [template.format(0) for template in templates]
+    parser = UserAgentParser()
+    for name, fn, inputs in [("ua-parser (uncached)", full_parse, fresh),
+                             ("fast path (uncached)", fast_parse, fresh),
+                             ("memoized (repeat UA)", parser.parse, lambda: seen)]:
+        seconds = timeit.timeit(lambda: [fn(ua) for ua in inputs()], number=rounds)
+        print(f"{name}: {seconds / (rounds * len(templates)) * 1e6:9.2f} us/parse")
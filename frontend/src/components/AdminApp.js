@@ -43,9 +43,23 @@ const AdminApp = () => {
     setIsAuthenticated(true);
   };
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    const token = localStorage.getItem('admin_token');
     localStorage.removeItem('admin_token');
     setIsAuthenticated(false);
+
+    if (token) {
+      try {
+        // Revoke the token server-side so a copied token stops working too
+        await axios.post(`${backendUrl}/api/auth/logout`, null, {
+          headers: {
+            'Authorization': `Bearer ${token}`
+          }
+        });
+      } catch (error) {
+        console.error('Logout request failed:', error);
+      }
+    }
   };
 
   if (loading) {
@@ -15,6 +15,7 @@ import {
   X
 } from 'lucide-react';
 import axios from 'axios';
+import { fetchAllPages } from '../utils/pagination';
 
 const AdminDashboard = ({ onLogout }) => {
   const [activeTab, setActiveTab] = useState('about');
@@ -61,20 +62,20 @@ const AdminDashboard = ({ onLogout }) => {
   const loadAllData = async () => {
     try {
       setLoading(true);
-      const [aboutRes, expRes, projectsRes, timelineRes, blogRes, contactRes] = await Promise.all([
+      const [aboutRes, expRes, projectItems, timelineItems, blogItems, contactRes] = await Promise.all([
         axios.get(`${backendUrl}/api/about`),
         axios.get(`${backendUrl}/api/experience`),
-        axios.get(`${backendUrl}/api/projects`),
-        axios.get(`${backendUrl}/api/timeline`),
-        axios.get(`${backendUrl}/api/blog`),
+        fetchAllPages(`${backendUrl}/api/projects`),
+        fetchAllPages(`${backendUrl}/api/timeline`),
+        fetchAllPages(`${backendUrl}/api/blog`),
         axios.get(`${backendUrl}/api/contact`)
       ]);
 
       setAboutData(aboutRes.data);
       setExperienceData(expRes.data);
-      setProjects(projectsRes.data);
-      setTimeline(timelineRes.data);
-      setBlogPosts(blogRes.data);
+      setProjects(projectItems);
+      setTimeline(timelineItems);
+      setBlogPosts(blogItems);
       setContactData(contactRes.data);
     } catch (error) {
       console.error('Error loading data:', error);
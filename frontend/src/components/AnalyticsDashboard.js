@@ -7,6 +7,26 @@ import { gsap } from 'gsap';
 import axios from 'axios';
 import analyticsService from '../services/analyticsService';
 
+// Apply an 'analytics_delta' push: counters are incremented, everything in "set" is replaced
+const applyStatsDelta = (stats, { increments = {}, set = {} }) => {
+  if (!stats) return stats;
+  const next = { ...stats, ...set };
+  Object.entries(increments).forEach(([field, amount]) => {
+    if (field === 'windows') {
+      next.windows = { ...stats.windows };
+      Object.entries(amount).forEach(([name, counters]) => {
+        next.windows[name] = { ...next.windows[name] };
+        Object.entries(counters).forEach(([counter, value]) => {
+          next.windows[name][counter] = (next.windows[name][counter] || 0) + value;
+        });
+      });
+    } else {
+      next[field] = (stats[field] || 0) + amount;
+    }
+  });
+  return next;
+};
+
 const AnalyticsDashboard = ({ backendUrl, getAuthHeaders }) => {
   const [analytics, setAnalytics] = useState(null);
   const [devToolsAlerts, setDevToolsAlerts] = useState([]);
@@ -17,18 +37,17 @@ const AnalyticsDashboard = ({ backendUrl, getAuthHeaders }) => {
 
   useEffect(() => {
     loadAnalyticsData();
+    // Stats are pushed by the server (a snapshot on join, then deltas), so there is no polling
+    setupLiveStats();
     setupRealTimeAlerts();
-    
-    // Refresh data every 30 seconds
-    const interval = setInterval(loadAnalyticsData, 30000);
-    return () => clearInterval(interval);
   }, []);
 
   useEffect(() => {
     if (analytics && !loading) {
       animateStatsCards();
     }
-  }, [analytics, loading]);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [loading]);
 
   const loadAnalyticsData = async () => {
     try {
@@ -46,12 +65,20 @@ const AnalyticsDashboard = ({ backendUrl, getAuthHeaders }) => {
     }
   };
 
+  const setupLiveStats = () => {
+    analyticsService.onAnalyticsSnapshot((stats) => setAnalytics(stats));
+    analyticsService.onAnalyticsDelta((delta) => setAnalytics(prev => applyStatsDelta(prev, delta)));
+  };
+
   const setupRealTimeAlerts = () => {
     const token = localStorage.getItem('admin_token');
     if (token) {
       analyticsService.joinAdminRoom(token);
       analyticsService.onDevToolsAlert((alert) => {
-        setRealTimeAlerts(prev => [alert, ...prev.slice(0, 4)]);
+        setRealTimeAlerts(prev => [
+          alert,
+          ...prev.filter(existing => existing.alert_id !== alert.alert_id)
+        ].slice(0, 5));
         
         // Show notification animation
         gsap.fromTo('.alert-notification', {
@@ -155,8 +182,9 @@ const AnalyticsDashboard = ({ backendUrl, getAuthHeaders }) => {
             <h3 className="text-red-400 font-semibold">Recent Dev Tools Activity</h3>
           </div>
           {realTimeAlerts.slice(0, 2).map((alert, index) => (
-            <div key={index} className="text-sm text-gray-300 mb-1">
+            <div key={alert.alert_id || index} className="text-sm text-gray-300 mb-1">
               User from {alert.location} opened dev tools on {alert.page_url}
+              {alert.count > 1 && ` (${alert.count} times)`}
             </div>
           ))}
         </div>
@@ -17,6 +17,7 @@ import {
   Activity
 } from 'lucide-react';
 import axios from 'axios';
+import { fetchAllPages } from '../utils/pagination';
 import AnalyticsDashboard from './AnalyticsDashboard';
 
 const EnhancedAdminDashboard = ({ onLogout }) => {
@@ -64,20 +65,20 @@ const EnhancedAdminDashboard = ({ onLogout }) => {
   const loadAllData = async () => {
     try {
       setLoading(true);
-      const [aboutRes, expRes, projectsRes, timelineRes, blogRes, contactRes] = await Promise.all([
+      const [aboutRes, expRes, projectItems, timelineItems, blogItems, contactRes] = await Promise.all([
         axios.get(`${backendUrl}/api/about`),
         axios.get(`${backendUrl}/api/experience`),
-        axios.get(`${backendUrl}/api/projects`),
-        axios.get(`${backendUrl}/api/timeline`),
-        axios.get(`${backendUrl}/api/blog`),
+        fetchAllPages(`${backendUrl}/api/projects`),
+        fetchAllPages(`${backendUrl}/api/timeline`),
+        fetchAllPages(`${backendUrl}/api/blog`),
         axios.get(`${backendUrl}/api/contact`)
       ]);
 
       setAboutData(aboutRes.data);
       setExperienceData(expRes.data);
-      setProjects(projectsRes.data);
-      setTimeline(timelineRes.data);
-      setBlogPosts(blogRes.data);
+      setProjects(projectItems);
+      setTimeline(timelineItems);
+      setBlogPosts(blogItems);
       setContactData(contactRes.data);
     } catch (error) {
       console.error('Error loading data:', error);
@@ -15,6 +15,10 @@ class AnalyticsService {
     this.pageStartTime = Date.now();
     this.devToolsOpen = false;
     this.isInitialized = false;
+    this.pageViewQueue = [];
+    this.pageViewFlushTimer = null;
+    this.pageViewFlushDelay = 5000;
+    this.pageViewBatchSize = 20;
     
     // Initialize Google Analytics if tracking ID is provided
     const GA_TRACKING_ID = process.env.REACT_APP_GA_TRACKING_ID;
@@ -117,24 +121,13 @@ class AnalyticsService {
       this.pageStartTime = Date.now();
 
       if (this.sessionId) {
-        const pageData = {
+        this.queuePageView({
           visitor_id: this.visitorId,
           session_id: this.sessionId,
           page_url: pageUrl,
           page_title: pageTitle || document.title,
           time_spent: 0
-        };
-
-        await axios.post(
-          `${this.backendUrl}/api/analytics/pageview`, 
-          pageData,
-          {
-            timeout: 5000,
-            headers: {
-              'Content-Type': 'application/json',
-            }
-          }
-        );
+        });
       }
 
       // Track with Google Analytics
@@ -149,28 +142,55 @@ class AnalyticsService {
   async updatePageTime(pageUrl, timeSpent) {
     try {
       if (this.sessionId && timeSpent > 5) { // Only track if spent more than 5 seconds
-        await axios.post(
-          `${this.backendUrl}/api/analytics/pageview`, 
-          {
-            visitor_id: this.visitorId,
-            session_id: this.sessionId,
-            page_url: pageUrl,
-            page_title: document.title,
-            time_spent: timeSpent
-          },
-          {
-            timeout: 5000,
-            headers: {
-              'Content-Type': 'application/json',
-            }
-          }
-        );
+        this.queuePageView({
+          visitor_id: this.visitorId,
+          session_id: this.sessionId,
+          page_url: pageUrl,
+          page_title: document.title,
+          time_spent: timeSpent
+        });
       }
     } catch (error) {
       console.warn('Page time update failed:', error.message);
     }
   }
 
+  queuePageView(pageData) {
+    this.pageViewQueue.push(pageData);
+    if (this.pageViewQueue.length >= this.pageViewBatchSize) {
+      this.flushPageViews();
+    } else if (!this.pageViewFlushTimer) {
+      this.pageViewFlushTimer = setTimeout(() => this.flushPageViews(), this.pageViewFlushDelay);
+    }
+  }
+
+  async flushPageViews() {
+    if (this.pageViewFlushTimer) {
+      clearTimeout(this.pageViewFlushTimer);
+      this.pageViewFlushTimer = null;
+    }
+    if (this.pageViewQueue.length === 0) {
+      return;
+    }
+
+    const batch = this.pageViewQueue;
+    this.pageViewQueue = [];
+    try {
+      await axios.post(
+        `${this.backendUrl}/api/analytics/pageview/batch`,
+        batch,
+        {
+          timeout: 5000,
+          headers: {
+            'Content-Type': 'application/json',
+          }
+        }
+      );
+    } catch (error) {
+      console.warn('Page view batch failed:', error.message);
+    }
+  }
+
   setupDevToolsDetection() {
     let devtools = {
       open: false,
@@ -261,16 +281,24 @@ class AnalyticsService {
           );
           
           if (timeSpent > 5) {
-            const payload = JSON.stringify({
+            this.pageViewQueue.push({
               visitor_id: this.visitorId,
               session_id: this.sessionId,
               page_url: this.currentPage,
               page_title: document.title,
               time_spent: timeSpent
             });
-            
+          }
+
+          if (this.pageViewQueue.length > 0) {
+            const payload = new Blob(
+              [JSON.stringify(this.pageViewQueue)],
+              { type: 'application/json' }
+            );
+            this.pageViewQueue = [];
+
             navigator.sendBeacon(
-              `${this.backendUrl}/api/analytics/pageview`,
+              `${this.backendUrl}/api/analytics/pageview/batch`,
               payload
             );
           }
@@ -311,7 +339,20 @@ class AnalyticsService {
 
   onDevToolsAlert(callback) {
     if (this.socket) {
-      this.socket.on('dev_tools_alert', callback);
+      // Alerts arrive in batches; repeats from one session come back under the same alert_id with a higher count
+      this.socket.on('dev_tools_alerts', (alerts) => alerts.forEach(callback));
+    }
+  }
+
+  onAnalyticsSnapshot(callback) {
+    if (this.socket) {
+      this.socket.on('analytics_snapshot', callback);
+    }
+  }
+
+  onAnalyticsDelta(callback) {
+    if (this.socket) {
+      this.socket.on('analytics_delta', callback);
     }
   }
 
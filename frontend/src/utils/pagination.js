@@ -0,0 +1,16 @@
+import axios from 'axios';
+
+// List endpoints return one page at a time and send the cursor of the next one in X-Next-Cursor
+export async function fetchAllPages(url, config = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(url, {
+      ...config,
+      params: { ...config.params, ...(cursor ? { cursor } : {}) },
+    });
+    items.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return items;
+}
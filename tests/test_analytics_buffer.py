@@ -0,0 +1,158 @@
+import asyncio
+import random
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from analytics_buffer import AnalyticsBufferFull, AnalyticsWriteBuffer
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    async def insert_many(self, documents, ordered=True):
+        failure = self.db.failures.pop(0) if self.db.failures else None
+        if isinstance(failure, BulkWriteError):
+            failed = {error["index"] for error in failure.details["writeErrors"]}
+            self.db.inserted.setdefault(self.name, []).extend(
+                document for index, document in enumerate(documents) if index not in failed)
+        if failure is not None:
+            raise failure
+        self.db.inserted.setdefault(self.name, []).extend(documents)
+
+
+class FakeDB:
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.inserted = {}
+
+    def __getitem__(self, name):
+        return FakeCollection(self, name)
+
+
+def bulk_error(*indexes, code=121):
+    return BulkWriteError({"writeErrors": [{"index": index, "code": code} for index in indexes],
+                           "nInserted": 0})
+
+
+def make_buffer(db, **options):
+    buffer = AnalyticsWriteBuffer(db, **options)
+    notified = []
+
+    async def listener(collection, documents):
+        notified.append((collection, [document["n"] for document in documents]))
+
+    buffer.add_flush_listener(listener)
+    return buffer, notified
+
+
+def test_flush_writes_in_batches_and_notifies_listeners():
+    db = FakeDB()
+    buffer, notified = make_buffer(db, batch_size=2)
+    for n in range(3):
+        buffer.enqueue("page_views", {"n": n})
+    buffer.enqueue("dev_tools_alerts", {"n": 9})
+    asyncio.run(buffer.flush())
+
+    assert [document["n"] for document in db.inserted["page_views"]] == [0, 1, 2]
+    assert sorted(notified) == [("dev_tools_alerts", [9]), ("page_views", [0, 1]), ("page_views", [2])]
+    assert buffer.depth == 0
+    assert buffer.metrics()["written"] == 4
+
+
+def test_drop_policy_discards_at_the_limit():
+    buffer, _ = make_buffer(FakeDB(), max_size=2, overflow_policy="drop")
+    assert [buffer.enqueue("page_views", {"n": n}) for n in range(4)] == [True, True, False, False]
+    assert buffer.metrics()["dropped"] == 2
+
+
+def test_reject_policy_raises_at_the_limit():
+    buffer, _ = make_buffer(FakeDB(), max_size=1, overflow_policy="reject")
+    buffer.enqueue("page_views", {"n": 0})
+    with pytest.raises(AnalyticsBufferFull):
+        buffer.enqueue("page_views", {"n": 1})
+    assert buffer.metrics()["rejected"] == 1
+
+
+def test_sample_policy_thins_out_near_the_limit():
+    random.seed(1)
+    buffer, _ = make_buffer(FakeDB(), max_size=1000, batch_size=10000, overflow_policy="sample", sample_rate=0.1)
+    for n in range(1000):
+        buffer.enqueue("page_views", {"n": n})
+    # Everything is admitted up to 80% occupancy, then about one in ten
+    assert buffer.depth < 1000
+    assert buffer.metrics()["sampled_out"] > 0
+    assert buffer.metrics()["dropped"] == 0
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        AnalyticsWriteBuffer(FakeDB(), overflow_policy="block")
+
+
+def test_partial_bulk_failure_notifies_the_inserted_documents():
+    db = FakeDB([bulk_error(1, 3)])
+    buffer, notified = make_buffer(db)
+    for n in range(5):
+        buffer.enqueue("page_views", {"n": n})
+    asyncio.run(buffer.flush())
+
+    assert notified == [("page_views", [0, 2, 4])]
+    assert buffer.metrics()["written"] == 3
+    assert buffer.metrics()["failed"] == 2
+
+
+def test_connection_error_requeues_the_batch():
+    db = FakeDB([AutoReconnect("connection reset")])
+    buffer, notified = make_buffer(db)
+    for n in range(3):
+        buffer.enqueue("page_views", {"n": n})
+
+    async def scenario():
+        await buffer.flush()
+        assert buffer.depth == 3 and notified == []
+        buffer.enqueue("page_views", {"n": 3})
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert notified == [("page_views", [0, 1, 2, 3])]
+    assert buffer.metrics()["requeued"] == 3
+    assert buffer.metrics()["failed"] == 0
+
+
+def test_requeue_is_bounded_by_max_size(monkeypatch):
+    db = FakeDB([AutoReconnect("connection reset")])
+    buffer, _ = make_buffer(db, max_size=4)
+    insert_many = FakeCollection.insert_many
+
+    async def slow_insert(collection, documents, ordered=True):
+        # New events arrive while the failing write is in flight
+        buffer.enqueue("page_views", {"n": 3})
+        buffer.enqueue("page_views", {"n": 4})
+        await insert_many(collection, documents, ordered)
+
+    for n in range(3):
+        buffer.enqueue("page_views", {"n": n})
+    monkeypatch.setattr(FakeCollection, "insert_many", slow_insert)
+    asyncio.run(buffer.flush())
+    assert buffer.depth == 4
+    assert buffer.metrics()["requeued"] == 2
+    assert buffer.metrics()["failed"] == 1
+
+
+def test_duplicates_from_a_requeued_write_count_as_written():
+    # The first attempt reached MongoDB but the reply was lost, so the retry hits duplicate keys
+    db = FakeDB([AutoReconnect("reply lost"), bulk_error(0, 1, code=11000)])
+    buffer, notified = make_buffer(db)
+    for n in range(2):
+        buffer.enqueue("page_views", {"n": n})
+
+    async def scenario():
+        await buffer.flush()
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert notified == [("page_views", [0, 1])]
+    assert buffer.metrics()["failed"] == 0
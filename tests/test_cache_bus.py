@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from cache_bus import CacheBus, LocalCacheBus, create_cache_bus
+
+
+def test_cache_bus_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBus()
+
+
+def test_single_worker_bus_publishes_nothing():
+    bus = create_cache_bus(None)
+    assert isinstance(bus, LocalCacheBus)
+    assert not bus.distributed
+    bus.publish("invalidate", {"tags": ["blog"]})
+    assert bus.stats()["published"] == 0
+
+
+def test_hub_delivers_to_other_buses_only():
+    async def scenario():
+        hub = []
+        first, second, third = LocalCacheBus(hub), LocalCacheBus(hub), LocalCacheBus(hub)
+        received = {bus: [] for bus in (first, second, third)}
+        for bus in received:
+            bus.subscribe("invalidate", lambda payload, bus=bus: received[bus].append(payload["tags"]))
+        for bus in received:
+            await bus.start()
+        first.publish("invalidate", {"tags": ["blog", "bootstrap"]})
+        first.publish("invalidate", {"tags": ["projects"]})
+        await asyncio.sleep(0.01)
+        for bus in received:
+            await bus.stop()
+        return received, first, second
+
+    received, first, second = asyncio.run(scenario())
+    assert received[first] == []
+    assert list(received.values())[1:] == [[["blog", "bootstrap"], ["projects"]]] * 2
+    assert first.stats()["published"] == 2
+    assert second.stats()["received"] == 2
+
+
+def test_async_handlers_and_handler_errors():
+    async def scenario():
+        hub = []
+        sender, receiver = LocalCacheBus(hub), LocalCacheBus(hub)
+        seen = []
+
+        async def handler(payload):
+            seen.append(payload["id"])
+
+        def failing(payload):
+            raise RuntimeError("boom")
+
+        receiver.subscribe("search", failing)
+        receiver.subscribe("search", handler)
+        sender.publish("search", {"kind": "blog", "id": "b1"})
+        await sender.stop()  # stop() sends whatever is still queued
+        return seen
+
+    assert asyncio.run(scenario()) == ["b1"]
+
+
+def test_payloads_are_json_encoded():
+    from datetime import datetime
+
+    async def scenario():
+        hub = []
+        sender, receiver = LocalCacheBus(hub), LocalCacheBus(hub)
+        seen = []
+        receiver.subscribe("session_ended", seen.append)
+        sender.publish("session_ended", {"session_start": datetime(2024, 5, 1, 12, 0), "session_end": None})
+        await sender.stop()
+        return seen
+
+    assert asyncio.run(scenario()) == [{"session_start": "2024-05-01T12:00:00", "session_end": None}]
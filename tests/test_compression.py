@@ -0,0 +1,29 @@
+import pytest
+
+from compression import encoded_etag, negotiate
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("gzip;q=0, br;q=0", None),
+    ("*", "br"),
+    ("*;q=0, gzip", "gzip"),
+    ("identity", None),
+    ("GZIP;q=0.8", "gzip"),
+    ("gzip;q=abc, br;q=0.1", "br"),
+])
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding, ("br", "gzip")) == expected
+
+
+def test_negotiate_only_offers_available_encodings():
+    assert negotiate("br, gzip;q=0.5", ("gzip",)) == "gzip"
+
+
+def test_encoded_etag():
+    assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert encoded_etag("W/abc", "br") == "W/abc"
@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from hyperloglog import HyperLogLog
+
+
+@pytest.mark.parametrize("cardinality", [10, 1000, 100000])
+def test_estimate_within_error_bound(cardinality):
+    sketch = HyperLogLog(precision=13)
+    for i in range(cardinality):
+        sketch.add(f"visitor-{i}")
+    # Standard error is 1.04 / sqrt(m); allow four of them
+    assert abs(sketch.count() - cardinality) <= max(4 * 1.04 / math.sqrt(sketch.m) * cardinality, 1)
+
+
+def test_duplicates_do_not_count():
+    sketch = HyperLogLog(precision=13)
+    for _ in range(5):
+        for i in range(500):
+            sketch.add(f"visitor-{i}")
+    assert abs(sketch.count() - 500) <= 20
+
+
+def test_merge_matches_union():
+    first, second, union = HyperLogLog(12), HyperLogLog(12), HyperLogLog(12)
+    for i in range(3000):
+        (first if i % 2 else second).add(f"v{i}")
+        union.add(f"v{i}")
+    first.merge(second)
+    assert first.registers == union.registers
+
+
+def test_merge_sparse_matches_merge():
+    first, second = HyperLogLog(12), HyperLogLog(12)
+    for i in range(200):
+        second.add(f"v{i}")
+    first.merge_sparse({str(index): rank for index, rank in enumerate(second.registers) if rank})
+    assert first.registers == second.registers
+
+
+def test_precision_is_validated():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=3)
+    with pytest.raises(ValueError):
+        HyperLogLog(12).merge(HyperLogLog(13))
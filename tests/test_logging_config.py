@@ -0,0 +1,85 @@
+import json
+import logging
+import random
+import sys
+
+import pytest
+
+import logging_config
+from logging_config import JsonFormatter, SamplingFilter, _QueueHandler, category_of, library_logger
+
+
+def record(name, level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    entry = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+
+def test_categories():
+    assert category_of("socketio.server") == "socket"
+    assert category_of("socket") == "socket"
+    assert category_of("uvicorn.access") == "request"
+    assert category_of("socketeer") is None
+    assert category_of("server") is None
+
+
+def test_sampling_keeps_warnings_and_uncategorized_records():
+    sampler = SamplingFilter({"socket": 0.0, "request": 0.0})
+    assert not sampler.filter(record("engineio.server"))
+    assert sampler.filter(record("engineio.server", logging.WARNING))
+    assert sampler.filter(record("server"))
+
+
+def test_sampling_rate():
+    random.seed(3)
+    sampler = SamplingFilter({"socket": 0.25})
+    kept = sum(sampler.filter(record("socket")) for _ in range(4000))
+    assert 800 < kept < 1200
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(record("uvicorn.access", route="/api/blog", status=200)))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["category"] == "request"
+    assert entry["route"] == "/api/blog" and entry["status"] == 200
+
+
+def test_queued_record_keeps_traceback_separate():
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        failing = logging.LogRecord("server", logging.ERROR, __file__, 1, "failed %d", (1,), sys.exc_info())
+    prepared = _QueueHandler(None).prepare(failing)
+    assert prepared.exc_info is None and prepared.args is None
+    entry = json.loads(JsonFormatter().format(prepared))
+    assert entry["message"] == "failed 1"
+    assert "ValueError: bad" in entry["exception"]
+
+
+def test_library_logger_has_no_handlers_of_its_own():
+    library = library_logger("engineio.server", debug=False)
+    assert library.handlers == []
+    assert library.level == logging.WARNING
+    assert library_logger("engineio.server", debug=True).level == logging.INFO
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    logging_config.stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_production_mode_writes_json_lines(restore_logging, capsys, monkeypatch):
+    monkeypatch.setenv("LOG_SAMPLE_SOCKET", "0")
+    assert logging_config.configure_logging("production") is False
+    logging.getLogger("server").warning("disk %s", "full")
+    logging.getLogger("socketio.server").info("sampled out")
+    logging.getLogger("socketio.server").error("kept")
+    logging_config.stop_logging()
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(line["logger"], line["message"]) for line in lines] == [("server", "disk full"), ("socketio.server", "kept")]
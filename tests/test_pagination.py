@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import pytest
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("sort_value", [datetime(2024, 3, 1, 12, 30, 15, 123000), 2021, "2021", None])
+def test_cursor_round_trip(sort_value):
+    cursor = encode_cursor(sort_value, "item-1")
+    assert decode_cursor(cursor) == (sort_value, "item-1")
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2024, 3, 1), "?&/+=")
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "e30", encode_cursor(1, "x")[:-3], "WzEsMl0"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
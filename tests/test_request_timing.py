@@ -0,0 +1,118 @@
+import asyncio
+import re
+import threading
+import time
+
+from request_timing import (LATENCY_BUCKETS, Histogram, MongoTimer, RequestMetrics, RequestTiming,
+                            TimingMiddleware, _current, phase)
+
+
+def in_request(timing, function, *args):
+    token = _current.set(timing)
+    try:
+        return function(*args)
+    finally:
+        _current.reset(token)
+
+
+def test_phase_is_charged_to_the_current_request_only():
+    timing = RequestTiming()
+
+    def work():
+        with phase("serialize"):
+            time.sleep(0.01)
+
+    in_request(timing, work)
+    with phase("serialize"):  # outside a request: no-op
+        pass
+    assert 0.01 <= timing.phases["serialize"] < 0.1
+
+
+def test_concurrent_commands_count_once():
+    timing = RequestTiming()
+    listener = MongoTimer()
+
+    def command():
+        listener.started(None)
+        time.sleep(0.05)
+        listener.succeeded(None)
+
+    threads = [threading.Thread(target=in_request, args=(timing, command)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 0.05 <= timing.phases["db"] < 0.15
+
+
+def test_failed_commands_are_timed_and_other_requests_untouched():
+    timing, other = RequestTiming(), RequestTiming()
+    listener = MongoTimer()
+    in_request(timing, listener.started, None)
+    in_request(timing, listener.failed, None)
+    assert "db" in timing.phases
+    assert other.phases == {}
+
+
+def test_server_timing_header():
+    timing = RequestTiming()
+    timing.add("db", 0.002)
+    timing.add("compress", 0.001)
+    header = timing.server_timing()
+    names = [metric.split(";")[0] for metric in header.split(", ")]
+    assert names == ["db", "compress", "app", "total"]
+    assert re.fullmatch(r"db;dur=2\.000, compress;dur=1\.000, app;dur=[\d.]+, total;dur=[\d.]+", header)
+
+
+def test_histogram_buckets():
+    assert list(LATENCY_BUCKETS) == sorted(LATENCY_BUCKETS)
+    histogram = Histogram()
+    histogram.observe(LATENCY_BUCKETS[0])
+    histogram.observe(LATENCY_BUCKETS[-1] * 2)
+    assert histogram.counts[0] == 1 and histogram.counts[-1] == 1
+    assert histogram.count == 2
+
+
+def test_prometheus_rendering():
+    metrics = RequestMetrics()
+    metrics.record("GET", "/api/blog/{post_id}", 200, 0.004, {"db": 0.003})
+    metrics.record("GET", "/api/blog/{post_id}", 200, 0.2, {})
+    text = metrics.render()
+    labels = 'method="GET",route="/api/blog/{post_id}",status="200"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"http_request_duration_seconds_count{{{labels}}} 2" in text
+    assert 'http_request_phase_seconds_count{method="GET",route="/api/blog/{post_id}",phase="db"} 2' in text
+    assert text.endswith("\n")
+
+
+def test_middleware_adds_header_and_records_route_template():
+    class Route:
+        path = "/api/items/{item_id}"
+
+    async def app(scope, receive, send):
+        if scope["path"] != "/missing":
+            scope["route"] = Route()
+        with phase("serialize"):
+            body = b"{}"
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": body})
+
+    async def scenario():
+        metrics = RequestMetrics()
+        middleware = TimingMiddleware(app, metrics)
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        for path in ("/api/items/1", "/api/items/2", "/missing"):
+            await middleware({"type": "http", "method": "GET", "path": path}, None, send)
+        return metrics, sent
+
+    metrics, sent = asyncio.run(scenario())
+    headers = dict(sent[0]["headers"])
+    assert headers[b"server-timing"].startswith(b"serialize;dur=")
+    text = metrics.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/items/{item_id}",status="200"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="200"} 1' in text
+    assert _current.get() is None
@@ -0,0 +1,202 @@
+import asyncio
+from datetime import datetime
+
+from response_cache import ResponseCache, http_date, not_modified, render_cached
+
+ETAG = '"abc"'
+MODIFIED = datetime(2024, 3, 1, 12, 0, 0, 500000)
+
+
+def test_if_none_match():
+    assert not_modified({"if-none-match": ETAG}, ETAG, MODIFIED)
+    assert not_modified({"if-none-match": f'"other", W/{ETAG}'}, ETAG, MODIFIED)
+    assert not_modified({"if-none-match": "*"}, ETAG, MODIFIED)
+    assert not not_modified({"if-none-match": '"other"'}, ETAG, MODIFIED)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    headers = {"if-none-match": '"other"', "if-modified-since": http_date(MODIFIED)}
+    assert not not_modified(headers, ETAG, MODIFIED)
+
+
+def test_if_modified_since():
+    assert not_modified({"if-modified-since": http_date(MODIFIED)}, ETAG, MODIFIED)
+    assert not_modified({"if-modified-since": "Sat, 02 Mar 2024 00:00:00 GMT"}, ETAG, MODIFIED)
+    assert not not_modified({"if-modified-since": "Thu, 29 Feb 2024 00:00:00 GMT"}, ETAG, MODIFIED)
+    assert not not_modified({"if-modified-since": "garbage"}, ETAG, MODIFIED)
+    assert not not_modified({"if-modified-since": http_date(MODIFIED)}, ETAG, None)
+
+
+def test_unconditional_request():
+    assert not not_modified({}, ETAG, MODIFIED)
+
+
+def test_leader_disconnect_does_not_fail_coalesced_requests():
+    async def scenario():
+        cache = ResponseCache()
+        release = asyncio.Event()
+
+        async def build():
+            await release.wait()
+            return render_cached({"ok": True})
+
+        leader = asyncio.create_task(cache.get("blog", None, build))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get("blog", None, build))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        body = await follower
+        return leader, body, cache
+
+    leader, body, cache = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert body.body == b'{"ok":true}'
+    assert cache.stats()["size"] == 1
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Builder:
+    """Builds numbered bodies, optionally holding each build until released"""
+
+    def __init__(self, gated: bool = False):
+        self.calls = 0
+        self.gate = asyncio.Event()
+        if not gated:
+            self.gate.set()
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await self.gate.wait()
+        return render_cached({"build": call})
+
+
+def test_concurrent_misses_share_one_build():
+    async def scenario():
+        cache = ResponseCache()
+        builder = Builder(gated=True)
+        requests = [asyncio.create_task(cache.get("blog", None, builder)) for _ in range(5)]
+        await asyncio.sleep(0)
+        builder.gate.set()
+        return await asyncio.gather(*requests), builder, cache
+
+    bodies, builder, cache = asyncio.run(scenario())
+    assert builder.calls == 1
+    assert {body.body for body in bodies} == {b'{"build":1}'}
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    async def scenario():
+        clock = Clock()
+        cache = ResponseCache(ttl=10, clock=clock)
+        builder = Builder()
+        first = await cache.get("blog", None, builder)
+        clock.now = 11
+        stale = [await cache.get("blog", None, builder) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        refreshed = await cache.get("blog", None, builder)
+        return first, stale, refreshed, builder, cache
+
+    first, stale, refreshed, builder, cache = asyncio.run(scenario())
+    assert [body.body for body in stale] == [first.body] * 3
+    assert refreshed.body == b'{"build":2}'
+    assert builder.calls == 2
+    assert cache.stats()["stale_hits"] == 3
+
+
+def test_tag_ttl_overrides_default():
+    async def scenario():
+        clock = Clock()
+        cache = ResponseCache(ttl=10, clock=clock, tag_ttls={"bootstrap": float("inf")})
+        builder = Builder()
+        await cache.get("bootstrap", None, builder)
+        clock.now = 1e9
+        await cache.get("bootstrap", None, builder)
+        return builder, cache
+
+    builder, cache = asyncio.run(scenario())
+    assert builder.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_build_overlapping_an_invalidation_is_not_stored():
+    async def scenario():
+        cache = ResponseCache()
+        builder = Builder(gated=True)
+        request = asyncio.create_task(cache.get("blog", None, builder))
+        await asyncio.sleep(0)
+        cache.invalidate("blog")
+        builder.gate.set()
+        served = await request
+        again = await cache.get("blog", None, builder)
+        return served, again, builder
+
+    served, again, builder = asyncio.run(scenario())
+    # The request that raced the invalidation still gets an answer, but later ones rebuild
+    assert served.body == b'{"build":1}'
+    assert again.body == b'{"build":2}'
+    assert builder.calls == 2
+
+
+def test_invalidate_drops_only_its_tags():
+    async def scenario():
+        cache = ResponseCache()
+        builder = Builder()
+        for tag in ("blog", "projects"):
+            for variant in (1, 2):
+                await cache.get(tag, variant, builder)
+        cache.invalidate("blog")
+        await cache.get("projects", 1, builder)
+        return builder, cache
+
+    builder, cache = asyncio.run(scenario())
+    assert builder.calls == 4
+    assert cache.stats()["size"] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    async def scenario():
+        cache = ResponseCache(max_entries=2)
+        builder = Builder()
+        await cache.get("blog", 1, builder)
+        await cache.get("blog", 2, builder)
+        await cache.get("blog", 1, builder)
+        await cache.get("blog", 3, builder)
+        await cache.get("blog", 1, builder)
+        await cache.get("blog", 2, builder)
+        return builder
+
+    # Variant 2 was the least recently used when 3 arrived
+    assert asyncio.run(scenario()).calls == 4
+
+
+def test_failed_build_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = ResponseCache()
+        gate = asyncio.Event()
+
+        async def failing():
+            await gate.wait()
+            raise RuntimeError("mongo down")
+
+        requests = [asyncio.create_task(cache.get("blog", None, failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        recovered = await cache.get("blog", None, Builder())
+        return results, recovered
+
+    results, recovered = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert recovered.body == b'{"build":1}'
@@ -0,0 +1,53 @@
+from search_index import SearchIndex, tokenize
+
+
+def post(post_id, title, content="", tags=(), published=True):
+    return {"id": post_id, "title": title, "excerpt": "", "content": content, "tags": list(tags),
+            "published": published}
+
+
+def build():
+    index = SearchIndex()
+    index.add("blog", post("title-match", "Quantum entanglement explained", "An introduction."))
+    index.add("blog", post("body-match", "Weekly notes", "Some words about quantum computing and more."))
+    index.add("blog", post("tag-match", "Reading list", "Books.", tags=["quantum"]))
+    index.add("blog", post("unrelated", "Gardening", "Tomatoes and basil."))
+    index.add("project", {"id": "p1", "title": "Solver", "description": "A quantum circuit simulator",
+                          "technologies": ["Python"]})
+    return index
+
+
+def test_title_outranks_tag_outranks_body():
+    ranked = [result["id"] for result in build().search("quantum", kinds=["blog"])]
+    assert ranked == ["title-match", "tag-match", "body-match"]
+
+
+def test_kind_filter_and_limit():
+    index = build()
+    assert [result["id"] for result in index.search("quantum", kinds=["project"])] == ["p1"]
+    assert len(index.search("quantum", limit=2)) == 2
+
+
+def test_rarer_terms_weigh_more():
+    index = build()
+    best = index.search("quantum tomatoes")[0]
+    assert best["id"] == "unrelated"
+
+
+def test_unpublished_posts_are_not_indexed():
+    index = build()
+    index.add("blog", post("title-match", "Quantum entanglement explained", published=False))
+    assert "title-match" not in [result["id"] for result in index.search("quantum")]
+
+
+def test_remove_and_reindex():
+    index = build()
+    index.remove("blog", "unrelated")
+    assert index.search("tomatoes") == []
+    index.add("blog", post("body-match", "Weekly notes", "Now about tomatoes"))
+    assert [result["id"] for result in index.search("tomatoes")] == ["body-match"]
+    assert "body-match" not in [result["id"] for result in index.search("quantum")]
+
+
+def test_tokenize_drops_markup_stopwords_and_single_characters():
+    assert tokenize("<p>The <b>Quantum</b> state of a qubit</p>") == ["quantum", "state", "qubit"]